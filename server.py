@@ -7,16 +7,21 @@ Usage: python server.py [port]
 Default port: 8080
 """
 
+import atexit
+import gzip
+import hashlib
 import json
 import os
 import platform
+import queue
 import subprocess
 import sys
 import threading
 import time
 import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
 
 PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
 PROJECT_ROOT = Path(__file__).parent
@@ -27,8 +32,15 @@ DATA_DIR = PROJECT_ROOT / "data"
 SCAN_LOG_PATH = PROJECT_ROOT / "data" / "scan.log"
 RENDER_LOG_PATH = PROJECT_ROOT / "data" / "render.log"
 
+# The detector script doesn't move at runtime, so check for it once
+DETECT_SCRIPT = PROJECT_ROOT / "src" / "detect_faces.py"
+DETECT_SCRIPT_STR = str(DETECT_SCRIPT)
+DETECT_SCRIPT_EXISTS = DETECT_SCRIPT.is_file()
+
 # Supported image extensions
-SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+SUPPORTED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp"})
+# Tuple form for a single str.endswith() check per filename
+SUPPORTED_SUFFIXES = tuple(SUPPORTED_EXTENSIONS)
 
 # Scan state tracking
 scan_state = {
@@ -38,11 +50,39 @@ scan_state = {
     "started_at": None,
     "finished_at": None
 }
+# Guards scan_state, which the scan thread updates while requests read it
+_scan_lock = threading.Lock()
+
+# Largest accepted POST body (landmark and config payloads are tiny)
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# JSON responses larger than this are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+# Scan output is appended to the log in batches rather than line by line
+SCAN_LOG_FLUSH_SECONDS = 0.1
+SCAN_LOG_FLUSH_BYTES = 64 * 1024
+
+# Cached /api/status response and its ETag, keyed on folder and face_data.json stats
+_status_cache = {"key": None, "value": None, "etag": None}
+_status_lock = threading.Lock()
+
+# Parsed face_data.json and a filename -> photo index, keyed on the file's
+# (mtime_ns, size). Handlers mutate the cached dict in place while holding
+# _face_data_lock, then persist it with save_face_data() or mark it dirty
+# for the debounced writer thread.
+_face_data_cache = {"key": None, "data": None, "by_name": None, "dirty": False, "version": 0}
+_face_data_lock = threading.RLock()
+
+# Debounce window for coalescing rapid edits into a single write
+SAVE_DEBOUNCE_SECONDS = 0.25
+_save_pending = threading.Event()
 
 # Import render module
 try:
     from src.render_video import (
-        render_video, get_render_state, cancel_render, get_capabilities
+        render_video, get_render_state, cancel_render, get_capabilities,
+        claim_render, release_render
     )
     HAS_RENDER = True
 except ImportError as e:
@@ -50,58 +90,237 @@ except ImportError as e:
     HAS_RENDER = False
 
 
+def launch_detached(args):
+    """Start a helper process without waiting for it or sharing our stdio."""
+    try:
+        subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"{args[0]} is not available on this system")
+
+
+# Open files and folders with the system default application, resolving the
+# platform once at startup rather than on every request
+SYSTEM = platform.system()
+if SYSTEM == "Darwin":  # macOS
+    def open_path(path):
+        launch_detached(["open", str(path)])
+elif SYSTEM == "Windows":
+    def open_path(path):
+        os.startfile(str(path))
+else:  # Linux
+    def open_path(path):
+        launch_detached(["xdg-open", str(path)])
+
+
+def complete_utf8_length(data):
+    """Length of data without a trailing, incomplete UTF-8 character."""
+    # Look back at most 3 bytes for the lead byte of the last character
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 != 0x80:  # Not a continuation byte
+            if byte >= 0xF8:
+                needed = 1  # Never valid in UTF-8, decoded as a replacement
+            elif byte >= 0xF0:
+                needed = 4
+            elif byte >= 0xE0:
+                needed = 3
+            elif byte >= 0xC0:
+                needed = 2
+            else:
+                needed = 1
+            return len(data) - back if back < needed else len(data)
+    return len(data)
+
+
+def stat_key(path):
+    """Return (mtime_ns, size) for a path, or None if it doesn't exist."""
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def json_etag(data):
+    """Return a quoted ETag derived from the JSON serialization of data."""
+    digest = hashlib.blake2b(json.dumps(data).encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def list_image_names(folder):
+    """Return names of supported images in a folder, or [] if it doesn't exist."""
+    try:
+        with os.scandir(folder) as entries:
+            return [
+                entry.name for entry in entries
+                if entry.name.lower().endswith(SUPPORTED_SUFFIXES)
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def load_face_data():
+    """
+    Return (face_data, photos_by_name), re-reading face_data.json only if it
+    changed on disk. Both objects are shared; hold _face_data_lock while using them.
+    """
+    with _face_data_lock:
+        key = stat_key(FACE_DATA_PATH)
+        # Unsaved edits take precedence over the file on disk
+        if not _face_data_cache["dirty"] and (key is None or key != _face_data_cache["key"]):
+            with open(FACE_DATA_PATH, "r") as f:
+                data = json.load(f)
+            by_name = {}
+            for photo in data.get("photos", []):
+                by_name.setdefault(photo.get("filename"), photo)
+            _face_data_cache["key"] = key
+            _face_data_cache["data"] = data
+            _face_data_cache["by_name"] = by_name
+        return _face_data_cache["data"], _face_data_cache["by_name"]
+
+
+def save_face_data(face_data):
+    """Write face_data.json and keep the parsed cache in sync."""
+    with _face_data_lock:
+        try:
+            # Serialize in one go and swap the file in atomically, so a crash
+            # mid-write can't leave a truncated face_data.json behind
+            tmp_path = FACE_DATA_PATH.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                # Compact output: the file is machine-managed and this halves its size
+                f.write(json.dumps(face_data, separators=(",", ":")))
+            os.replace(tmp_path, FACE_DATA_PATH)
+        except Exception:
+            # The cached dict no longer matches the file, force a reload
+            _face_data_cache["key"] = None
+            raise
+        _face_data_cache["key"] = stat_key(FACE_DATA_PATH)
+        _face_data_cache["dirty"] = False
+
+
+def schedule_face_data_save():
+    """Mark the cached face_data as modified; the writer thread saves it shortly."""
+    with _face_data_lock:
+        _face_data_cache["dirty"] = True
+        _face_data_cache["version"] += 1
+    _save_pending.set()
+
+
+def flush_face_data():
+    """Save pending face_data edits now, if there are any."""
+    with _face_data_lock:
+        if _face_data_cache["dirty"]:
+            save_face_data(_face_data_cache["data"])
+
+
+def face_data_writer():
+    """Background loop that coalesces edits into at most one write per debounce window."""
+    while True:
+        _save_pending.wait()
+        time.sleep(SAVE_DEBOUNCE_SECONDS)
+        _save_pending.clear()
+        try:
+            flush_face_data()
+        except Exception as e:
+            print(f"Error saving face_data.json: {e}")
+
+
+atexit.register(flush_face_data)
+
+
+def scan_log_writer(chunks):
+    """
+    Append queued output bytes to the scan log and server console, flushing
+    at most every SCAN_LOG_FLUSH_SECONDS or SCAN_LOG_FLUSH_BYTES. Stops at None.
+    """
+    batch = []
+    batch_bytes = 0
+    deadline = None
+
+    log_fd = os.open(SCAN_LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                chunk = chunks.get(timeout=timeout)
+            except queue.Empty:
+                chunk = b""  # Deadline reached with no new output
+
+            if chunk:
+                if not batch:
+                    deadline = time.monotonic() + SCAN_LOG_FLUSH_SECONDS
+                batch.append(chunk)
+                batch_bytes += len(chunk)
+
+            if batch and (chunk is None or batch_bytes >= SCAN_LOG_FLUSH_BYTES
+                          or time.monotonic() >= deadline):
+                data = b"".join(batch)
+                os.write(log_fd, data)
+                sys.stdout.buffer.write(data)  # Also print to server console
+                sys.stdout.buffer.flush()
+                batch.clear()
+                batch_bytes = 0
+                deadline = None
+
+            if chunk is None:
+                return
+    finally:
+        os.close(log_fd)
+
+
 class FaceTimelineHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between the frontend's polls
+    protocol_version = "HTTP/1.1"
+
     def do_GET(self):
-        if self.path == "/api/status":
-            self.handle_get_status()
-        elif self.path == "/api/scan-status":
-            self.handle_get_scan_status()
-        elif self.path == "/api/scan-log":
-            self.handle_get_scan_log()
-        elif self.path.startswith("/api/open-folder"):
-            self.handle_open_folder()
-        elif self.path.startswith("/api/open-file"):
-            self.handle_open_file()
-        elif self.path == "/api/render-status":
-            self.handle_get_render_status()
-        elif self.path == "/api/render-log":
-            self.handle_get_render_log()
-        elif self.path == "/api/render-capabilities":
-            self.handle_get_render_capabilities()
+        # Parse the URL once; handlers read query params from self.query
+        url = urlsplit(self.path)
+        self.query = dict(parse_qsl(url.query))
+
+        handler = self.GET_ROUTES.get(url.path)
+        if handler:
+            handler(self)
         else:
             super().do_GET()
 
     def do_POST(self):
-        if self.path == "/api/save-landmarks":
-            self.handle_save_landmarks()
-        elif self.path == "/api/save-date":
-            self.handle_save_date()
-        elif self.path == "/api/save-birthdate":
-            self.handle_save_birthdate()
-        elif self.path == "/api/delete-photo":
-            self.handle_delete_photo()
-        elif self.path == "/api/scan":
-            self.handle_scan()
-        elif self.path == "/api/render":
-            self.handle_render()
-        elif self.path == "/api/render-cancel":
-            self.handle_render_cancel()
+        handler = self.POST_ROUTES.get(urlsplit(self.path).path)
+        if handler:
+            handler(self)
         else:
+            # The body was never read, so it can't be reused for another request
+            self.close_connection = True
             self.send_error(404, "Not Found")
 
     def handle_get_status(self):
         """Return status information about photos and processing."""
         try:
-            # Count photos in folders
-            photos_count = sum(
-                1 for f in PHOTOS_DIR.glob("*")
-                if f.suffix.lower() in SUPPORTED_EXTENSIONS
-            ) if PHOTOS_DIR.exists() else 0
-
-            reference_count = sum(
-                1 for f in REFERENCE_DIR.glob("*")
-                if f.suffix.lower() in SUPPORTED_EXTENSIONS
-            ) if REFERENCE_DIR.exists() else 0
+            # Folder mtimes change when files are added or removed, so the
+            # previous response is still valid while none of these change.
+            # The version counter covers edits not yet written to disk.
+            with _face_data_lock:
+                data_version = _face_data_cache["version"]
+            cache_key = (
+                stat_key(PHOTOS_DIR),
+                stat_key(REFERENCE_DIR),
+                stat_key(FACE_DATA_PATH),
+                data_version
+            )
+            # Copy under the lock but send after it, so a slow client can't
+            # hold up other pollers (cached values are replaced, never mutated)
+            cached = None
+            with _status_lock:
+                if cache_key == _status_cache["key"]:
+                    cached = (_status_cache["value"], _status_cache["etag"])
+            if cached:
+                self.send_json_response(200, cached[0], etag=cached[1])
+                return
 
             # Load face_data.json for processed count
             processed_count = 0
@@ -110,8 +329,8 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
             if FACE_DATA_PATH.exists():
                 try:
-                    with open(FACE_DATA_PATH, "r") as f:
-                        face_data = json.load(f)
+                    with _face_data_lock:
+                        face_data, _ = load_face_data()
                         for photo in face_data.get("photos", []):
                             processed_filenames.add(photo.get("filename"))
                             # Check both "subject" and legacy "ben" keys
@@ -119,36 +338,40 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                             subject = faces.get("subject") or faces.get("ben")
                             if subject and subject.get("detected"):
                                 subject_detected_count += 1
-                        processed_count = len(processed_filenames)
+                    processed_count = len(processed_filenames)
                 except (json.JSONDecodeError, IOError):
                     pass
 
-            # Find unprocessed photos
-            unprocessed = []
-            if PHOTOS_DIR.exists():
-                for f in PHOTOS_DIR.glob("*"):
-                    if f.suffix.lower() in SUPPORTED_EXTENSIONS and f.name not in processed_filenames:
-                        unprocessed.append(f.name)
+            # Count photos and find unprocessed ones in a single folder pass
+            photo_names = list_image_names(PHOTOS_DIR)
+            photos_count = len(photo_names)
+            unprocessed = [name for name in photo_names if name not in processed_filenames]
 
-            self.send_json_response(200, {
+            reference_count = len(list_image_names(REFERENCE_DIR))
+
+            status = {
                 "photos_count": photos_count,
                 "reference_count": reference_count,
                 "processed_count": processed_count,
                 "subject_detected_count": subject_detected_count,
                 "unprocessed": unprocessed,
                 "unprocessed_count": len(unprocessed)
-            })
+            }
+
+            etag = json_etag(status)
+            with _status_lock:
+                _status_cache["key"] = cache_key
+                _status_cache["value"] = status
+                _status_cache["etag"] = etag
+
+            self.send_json_response(200, status, etag=etag)
         except Exception as e:
             self.send_json_response(500, {"error": str(e)})
 
     def handle_open_folder(self):
         """Open a folder in the system file manager."""
         try:
-            # Parse query params
-            from urllib.parse import urlparse, parse_qs
-            parsed = urlparse(self.path)
-            params = parse_qs(parsed.query)
-            folder_type = params.get("type", ["photos"])[0]
+            folder_type = self.query.get("type", "photos")
 
             # Map type to path
             folder_map = {
@@ -163,14 +386,8 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
             # Create folder if it doesn't exist
             folder_path.mkdir(parents=True, exist_ok=True)
 
-            # Open in file manager (cross-platform)
-            system = platform.system()
-            if system == "Darwin":  # macOS
-                subprocess.run(["open", str(folder_path)])
-            elif system == "Windows":
-                subprocess.run(["explorer", str(folder_path)])
-            else:  # Linux
-                subprocess.run(["xdg-open", str(folder_path)])
+            # Open in file manager
+            open_path(folder_path)
 
             self.send_json_response(200, {"success": True, "path": str(folder_path)})
         except Exception as e:
@@ -179,10 +396,7 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
     def handle_open_file(self):
         """Open a file with the default system application."""
         try:
-            from urllib.parse import urlparse, parse_qs
-            parsed = urlparse(self.path)
-            params = parse_qs(parsed.query)
-            file_path = params.get("path", [None])[0]
+            file_path = self.query.get("path")
 
             if not file_path:
                 self.send_json_response(400, {"error": "Missing path parameter"})
@@ -193,14 +407,8 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                 self.send_json_response(404, {"error": "File not found"})
                 return
 
-            # Open file with default application (cross-platform)
-            system = platform.system()
-            if system == "Darwin":  # macOS
-                subprocess.run(["open", str(file_path)])
-            elif system == "Windows":
-                os.startfile(str(file_path))
-            else:  # Linux
-                subprocess.run(["xdg-open", str(file_path)])
+            # Open file with default application
+            open_path(file_path)
 
             self.send_json_response(200, {"success": True, "path": str(file_path)})
         except Exception as e:
@@ -208,43 +416,43 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
     def handle_get_scan_status(self):
         """Return current scan status."""
-        self.send_json_response(200, scan_state)
+        with _scan_lock:
+            snapshot = dict(scan_state)
+        self.send_json_response(200, snapshot)
 
     def handle_get_scan_log(self):
-        """Return current scan log contents."""
-        try:
-            if SCAN_LOG_PATH.exists():
-                with open(SCAN_LOG_PATH, "r") as f:
-                    log_content = f.read()
-            else:
-                log_content = ""
-            self.send_json_response(200, {"log": log_content})
-        except Exception as e:
-            self.send_json_response(500, {"error": str(e)})
+        """Return scan log contents from the ?since= byte offset onwards."""
+        self.send_log_tail(SCAN_LOG_PATH)
 
     def handle_scan(self):
         """Start face detection on photos (runs in background)."""
-        global scan_state
+        # No body is expected, but drain any so the connection is left clean
+        self.discard_request_body()
 
-        # Check if already running
-        if scan_state["running"]:
-            self.send_json_response(409, {"error": "Scan already in progress"})
+        if not DETECT_SCRIPT_EXISTS:
+            self.send_json_response(404, {"error": "detect_faces.py not found"})
             return
 
-        detect_script = PROJECT_ROOT / "src" / "detect_faces.py"
-
-        if not detect_script.exists():
-            self.send_json_response(404, {"error": "detect_faces.py not found"})
+        # Check and claim the scan atomically, requests run on parallel threads
+        with _scan_lock:
+            already_running = scan_state["running"]
+            if not already_running:
+                # Reset scan state
+                scan_state.update({
+                    "running": True,
+                    "success": None,
+                    "return_code": None,
+                    "started_at": time.time(),
+                    "finished_at": None
+                })
+                snapshot = dict(scan_state)
+
+        if already_running:
+            self.send_json_response(409, {"error": "Scan already in progress"})
             return
 
-        # Reset scan state
-        scan_state = {
-            "running": True,
-            "success": None,
-            "return_code": None,
-            "started_at": time.time(),
-            "finished_at": None
-        }
+        # detect_faces.py reads face_data.json, so persist pending edits first
+        flush_face_data()
 
         # Clear the log file
         with open(SCAN_LOG_PATH, "w") as f:
@@ -252,44 +460,52 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
         # Start scan in background thread
         def run_scan():
-            global scan_state
             try:
                 # Run the script with unbuffered output
+                # Output is kept as raw bytes end to end, no decode/encode
                 process = subprocess.Popen(
-                    [sys.executable, "-u", str(detect_script)],
+                    [sys.executable, "-u", DETECT_SCRIPT_STR],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
-                    text=True,
-                    cwd=str(PROJECT_ROOT),
-                    bufsize=1
+                    cwd=str(PROJECT_ROOT)
                 )
 
-                # Stream output to log file
-                with open(SCAN_LOG_PATH, "a") as log_file:
-                    for line in process.stdout:
-                        log_file.write(line)
-                        log_file.flush()
-                        print(line, end="")  # Also print to server console
+                # Stream output to log file through a batching writer thread
+                log_queue = queue.Queue()
+                log_writer = threading.Thread(
+                    target=scan_log_writer, args=(log_queue,), daemon=True
+                )
+                log_writer.start()
+                try:
+                    # read1() returns whatever is available, up to 8 KB
+                    for chunk in iter(lambda: process.stdout.read1(8192), b""):
+                        log_queue.put(chunk)
+                finally:
+                    log_queue.put(None)
+                    log_writer.join()
 
                 process.wait()
 
-                scan_state["success"] = process.returncode == 0
-                scan_state["return_code"] = process.returncode
+                with _scan_lock:
+                    scan_state["success"] = process.returncode == 0
+                    scan_state["return_code"] = process.returncode
 
             except Exception as e:
                 with open(SCAN_LOG_PATH, "a") as log_file:
                     log_file.write(f"\nError: {str(e)}\n")
-                scan_state["success"] = False
-                scan_state["return_code"] = -1
+                with _scan_lock:
+                    scan_state["success"] = False
+                    scan_state["return_code"] = -1
 
             finally:
-                scan_state["running"] = False
-                scan_state["finished_at"] = time.time()
+                with _scan_lock:
+                    scan_state["running"] = False
+                    scan_state["finished_at"] = time.time()
 
         thread = threading.Thread(target=run_scan, daemon=True)
         thread.start()
 
-        self.send_json_response(200, {"message": "Scan started", "status": scan_state})
+        self.send_json_response(200, {"message": "Scan started", "status": snapshot})
 
     def handle_get_render_status(self):
         """Return current render status."""
@@ -299,16 +515,8 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
         self.send_json_response(200, get_render_state())
 
     def handle_get_render_log(self):
-        """Return current render log contents."""
-        try:
-            if RENDER_LOG_PATH.exists():
-                with open(RENDER_LOG_PATH, "r") as f:
-                    log_content = f.read()
-            else:
-                log_content = ""
-            self.send_json_response(200, {"log": log_content})
-        except Exception as e:
-            self.send_json_response(500, {"error": str(e)})
+        """Return render log contents from the ?since= byte offset onwards."""
+        self.send_log_tail(RENDER_LOG_PATH)
 
     def handle_get_render_capabilities(self):
         """Return available render encoders and formats."""
@@ -324,32 +532,39 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
     def handle_render(self):
         """Start video render (runs in background)."""
+        # Read the body first so the connection is left clean on early returns
+        config = self.read_json_body()
+        if config is None:
+            return
+
         if not HAS_RENDER:
             self.send_json_response(500, {"error": "Render module not available"})
             return
 
-        # Check if already running
-        state = get_render_state()
-        if state["running"]:
+        # Check and claim the render atomically, requests run on parallel threads
+        if not claim_render():
             self.send_json_response(409, {"error": "Render already in progress"})
             return
 
         try:
-            content_length = int(self.headers["Content-Length"])
-            body = self.rfile.read(content_length)
-            config = json.loads(body)
+            # The renderer reads face_data.json, so persist pending edits first
+            flush_face_data()
 
             # Start render in background thread
             thread = threading.Thread(target=render_video, args=(config,), daemon=True)
             thread.start()
-
-            self.send_json_response(200, {"message": "Render started"})
-
         except Exception as e:
+            release_render()
             self.send_json_response(500, {"error": str(e)})
+            return
+
+        self.send_json_response(200, {"message": "Render started"})
 
     def handle_render_cancel(self):
         """Cancel active render."""
+        # No body is expected, but drain any so the connection is left clean
+        self.discard_request_body()
+
         if not HAS_RENDER:
             self.send_json_response(500, {"error": "Render module not available"})
             return
@@ -364,9 +579,9 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
     def handle_save_landmarks(self):
         try:
-            content_length = int(self.headers["Content-Length"])
-            body = self.rfile.read(content_length)
-            data = json.loads(body)
+            data = self.read_json_body()
+            if data is None:
+                return
 
             filename = data.get("filename")
             landmarks = data.get("landmarks")
@@ -375,14 +590,18 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                 self.send_json_response(400, {"error": "Missing filename or landmarks"})
                 return
 
-            # Load current face_data.json
-            with open(FACE_DATA_PATH, "r") as f:
-                face_data = json.load(f)
+            # Single-point landmark format
+            new_landmarks = {
+                "left_eye": [[landmarks["left_eye"]["x"], landmarks["left_eye"]["y"]]],
+                "right_eye": [[landmarks["right_eye"]["x"], landmarks["right_eye"]["y"]]],
+                "top_lip": [[landmarks["mouth"]["x"], landmarks["mouth"]["y"]]]
+            }
+
+            with _face_data_lock:
+                face_data, photos_by_name = load_face_data()
 
-            # Find the photo and update landmarks
-            updated = False
-            for photo in face_data.get("photos", []):
-                if photo.get("filename") == filename:
+                photo = photos_by_name.get(filename)
+                if photo is not None:
                     # Ensure subject face object exists
                     if "faces" not in photo:
                         photo["faces"] = {}
@@ -397,30 +616,21 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                             "landmarks": {}
                         }
 
-                    # Update landmarks with single-point format
-                    photo["faces"]["subject"]["landmarks"] = {
-                        "left_eye": [[landmarks["left_eye"]["x"], landmarks["left_eye"]["y"]]],
-                        "right_eye": [[landmarks["right_eye"]["x"], landmarks["right_eye"]["y"]]],
-                        "top_lip": [[landmarks["mouth"]["x"], landmarks["mouth"]["y"]]]
-                    }
+                    photo["faces"]["subject"]["landmarks"] = new_landmarks
                     photo["faces"]["subject"]["detected"] = True
 
                     # Remove legacy "ben" key if present
                     if "ben" in photo["faces"]:
                         del photo["faces"]["ben"]
 
-                    updated = True
-                    print(f"Updated landmarks for {filename}")
-                    break
+                    schedule_face_data_save()
 
-            if not updated:
+            # Respond outside the lock, sending can block on a slow client
+            if photo is None:
                 self.send_json_response(404, {"error": f"Photo {filename} not found"})
                 return
 
-            # Save updated face_data.json
-            with open(FACE_DATA_PATH, "w") as f:
-                json.dump(face_data, f, indent=2)
-
+            print(f"Updated landmarks for {filename}")
             self.send_json_response(200, {"success": True, "filename": filename})
 
         except Exception as e:
@@ -429,9 +639,9 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
     def handle_save_date(self):
         try:
-            content_length = int(self.headers["Content-Length"])
-            body = self.rfile.read(content_length)
-            data = json.loads(body)
+            data = self.read_json_body()
+            if data is None:
+                return
 
             filename = data.get("filename")
             date_taken = data.get("date_taken")
@@ -440,30 +650,24 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                 self.send_json_response(400, {"error": "Missing filename or date_taken"})
                 return
 
-            # Load current face_data.json
-            with open(FACE_DATA_PATH, "r") as f:
-                face_data = json.load(f)
+            with _face_data_lock:
+                face_data, photos_by_name = load_face_data()
 
-            # Find the photo and update date
-            updated = False
-            for photo in face_data.get("photos", []):
-                if photo.get("filename") == filename:
+                photo = photos_by_name.get(filename)
+                if photo is not None:
                     if "metadata" not in photo:
                         photo["metadata"] = {}
                     photo["metadata"]["date_taken"] = date_taken
                     photo["metadata"]["date_source"] = "manual"
-                    updated = True
-                    print(f"Updated date for {filename}: {date_taken}")
-                    break
 
-            if not updated:
+                    schedule_face_data_save()
+
+            # Respond outside the lock, sending can block on a slow client
+            if photo is None:
                 self.send_json_response(404, {"error": f"Photo {filename} not found"})
                 return
 
-            # Save updated face_data.json
-            with open(FACE_DATA_PATH, "w") as f:
-                json.dump(face_data, f, indent=2)
-
+            print(f"Updated date for {filename}: {date_taken}")
             self.send_json_response(200, {"success": True, "filename": filename})
 
         except Exception as e:
@@ -473,9 +677,9 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
     def handle_save_birthdate(self):
         """Save birth date to face_data.json."""
         try:
-            content_length = int(self.headers["Content-Length"])
-            body = self.rfile.read(content_length)
-            data = json.loads(body)
+            data = self.read_json_body()
+            if data is None:
+                return
 
             birthdate = data.get("birthDate")
 
@@ -483,16 +687,13 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                 self.send_json_response(400, {"error": "Missing birthDate"})
                 return
 
-            # Load current face_data.json
-            with open(FACE_DATA_PATH, "r") as f:
-                face_data = json.load(f)
+            with _face_data_lock:
+                face_data, _ = load_face_data()
 
-            # Update birthDate
-            face_data["birthDate"] = birthdate
+                # Update birthDate
+                face_data["birthDate"] = birthdate
 
-            # Save updated face_data.json
-            with open(FACE_DATA_PATH, "w") as f:
-                json.dump(face_data, f, indent=2)
+                schedule_face_data_save()
 
             print(f"Updated birthDate: {birthdate}")
             self.send_json_response(200, {"success": True, "birthDate": birthdate})
@@ -503,9 +704,9 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
 
     def handle_delete_photo(self):
         try:
-            content_length = int(self.headers["Content-Length"])
-            body = self.rfile.read(content_length)
-            data = json.loads(body)
+            data = self.read_json_body()
+            if data is None:
+                return
 
             filename = data.get("filename")
 
@@ -513,22 +714,23 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
                 self.send_json_response(400, {"error": "Missing filename"})
                 return
 
-            # Load current face_data.json
-            with open(FACE_DATA_PATH, "r") as f:
-                face_data = json.load(f)
+            with _face_data_lock:
+                face_data, photos_by_name = load_face_data()
 
-            # Find and remove the photo from data
-            original_count = len(face_data.get("photos", []))
-            face_data["photos"] = [p for p in face_data.get("photos", []) if p.get("filename") != filename]
+                found = filename in photos_by_name
+                if found:
+                    # Remove the photo from data
+                    del photos_by_name[filename]
+                    face_data["photos"] = [p for p in face_data["photos"] if p.get("filename") != filename]
 
-            if len(face_data["photos"]) == original_count:
+                    # Save right away (not debounced) so deletions are durable
+                    save_face_data(face_data)
+
+            # Respond outside the lock, sending can block on a slow client
+            if not found:
                 self.send_json_response(404, {"error": f"Photo {filename} not found in data"})
                 return
 
-            # Save updated face_data.json
-            with open(FACE_DATA_PATH, "w") as f:
-                json.dump(face_data, f, indent=2)
-
             # Delete the actual photo file
             photo_path = PHOTOS_DIR / filename
             if photo_path.exists():
@@ -544,20 +746,158 @@ class FaceTimelineHandler(SimpleHTTPRequestHandler):
             print(f"Error deleting photo: {e}")
             self.send_json_response(500, {"error": str(e)})
 
-    def send_json_response(self, status, data):
+    def discard_request_body(self):
+        """
+        Read and drop the request body of handlers that don't use one, so the
+        bytes aren't parsed as the next request on a kept-alive connection.
+        """
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            content_length = -1
+        if 0 <= content_length <= MAX_REQUEST_BYTES:
+            self.rfile.read(content_length)
+        else:
+            # Body is left unread, so this connection can't be kept alive
+            self.close_connection = True
+
+    def read_json_body(self):
+        """
+        Read and parse a JSON object request body. Sends an error response
+        and returns None if the body is missing, too large, or malformed.
+        """
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0 or content_length > MAX_REQUEST_BYTES:
+            # Body is left unread, so this connection can't be kept alive
+            self.close_connection = True
+            if content_length < 0:
+                self.send_json_response(400, {"error": "Invalid Content-Length"})
+            else:
+                self.send_json_response(413, {"error": "Request body too large"})
+            return None
+
+        try:
+            data = json.loads(self.rfile.read(content_length))
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            self.send_json_response(400, {"error": "Request body must be a JSON object"})
+            return None
+        return data
+
+    def send_log_tail(self, log_path):
+        """
+        Send the part of a log file after the ?since= byte offset, so pollers
+        only transfer new output. Responds with {"log", "since", "offset"};
+        "since" is 0 when the whole log is returned (e.g. after it was cleared).
+        """
+        try:
+            try:
+                since = max(0, int(self.query.get("since", 0)))
+            except ValueError:
+                since = 0
+
+            # Both shortcuts below only need a stat(), not an open + read
+            key = stat_key(log_path)
+            etag = f'"{key[0]}-{key[1]}"' if key else None
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_not_modified(etag)
+                return
+
+            log_content = ""
+            offset = 0
+            if key and since == key[1]:
+                # Client is already up to date
+                offset = since
+            elif key:
+                with open(log_path, "rb") as f:
+                    # Log is shorter than the client's offset, so it was restarted
+                    if since > os.fstat(f.fileno()).st_size:
+                        since = 0
+                    f.seek(since)
+                    chunk = f.read()
+                    # Stop before a character still being written, so the next
+                    # poll starts on a character boundary
+                    complete = complete_utf8_length(chunk)
+                    log_content = chunk[:complete].decode("utf-8", errors="replace")
+                    offset = since + complete
+            else:
+                since = 0
+
+            self.send_json_response(200, {
+                "log": log_content,
+                "since": since,
+                "offset": offset
+            }, etag=etag)
+        except Exception as e:
+            self.send_json_response(500, {"error": str(e)})
+
+    def send_json_response(self, status, data, etag=None):
+        # Let polling clients revalidate instead of re-downloading unchanged data
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_not_modified(etag)
+            return
+
+        body = json.dumps(data).encode()
+        # Logs and long status lists compress well; level 1 is plenty for text
+        gzipped = (len(body) > GZIP_MIN_BYTES
+                   and "gzip" in self.headers.get("Accept-Encoding", ""))
+        if gzipped:
+            body = gzip.compress(body, compresslevel=1)
+
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
 
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
+    # API routes (exact path match); anything else on GET is served as a static file
+    GET_ROUTES = {
+        "/api/status": handle_get_status,
+        "/api/scan-status": handle_get_scan_status,
+        "/api/scan-log": handle_get_scan_log,
+        "/api/open-folder": handle_open_folder,
+        "/api/open-file": handle_open_file,
+        "/api/render-status": handle_get_render_status,
+        "/api/render-log": handle_get_render_log,
+        "/api/render-capabilities": handle_get_render_capabilities,
+    }
+
+    POST_ROUTES = {
+        "/api/save-landmarks": handle_save_landmarks,
+        "/api/save-date": handle_save_date,
+        "/api/save-birthdate": handle_save_birthdate,
+        "/api/delete-photo": handle_delete_photo,
+        "/api/scan": handle_scan,
+        "/api/render": handle_render,
+        "/api/render-cancel": handle_render_cancel,
+    }
+
 
 if __name__ == "__main__":
     url = f"http://localhost:{PORT}/web/"
@@ -572,6 +912,8 @@ if __name__ == "__main__":
     print(f"  - Reference: {REFERENCE_DIR}")
     print(f"  - Data: {FACE_DATA_PATH}")
     print(f"")
+    if not DETECT_SCRIPT_EXISTS:
+        print(f"Warning: {DETECT_SCRIPT} not found, scanning is disabled\n")
     print("Press Ctrl+C to stop\n")
 
     # Open browser after a short delay to ensure server is ready
@@ -580,8 +922,10 @@ if __name__ == "__main__":
         webbrowser.open(url)
 
     threading.Thread(target=open_browser, daemon=True).start()
+    threading.Thread(target=face_data_writer, daemon=True).start()
 
-    server = HTTPServer(("", PORT), FaceTimelineHandler)
+    # Threaded so frequent status/log polls don't queue behind slower requests
+    server = ThreadingHTTPServer(("", PORT), FaceTimelineHandler)
     try:
         server.serve_forever()
     except KeyboardInterrupt:
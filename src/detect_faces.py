@@ -6,15 +6,39 @@ Detects all faces in photos, identifies the subject using reference photos,
 and outputs structured JSON with position, scale, and rotation data.
 """
 
+import copy
+import hashlib
 import json
+import math
+import multiprocessing
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 
+import cv2
+import dlib
 import face_recognition
+import face_recognition_models
 import numpy as np
 from PIL import Image
 
+# Try to import orjson for faster reading and writing of face_data.json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Try to load libjpeg-turbo for faster JPEG decoding
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    turbo_jpeg = TurboJPEG()
+    HAS_TURBOJPEG = True
+except (ImportError, OSError, RuntimeError):
+    HAS_TURBOJPEG = False
+
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from extract_metadata import extract_metadata
@@ -26,15 +50,70 @@ PROJECT_ROOT = Path(__file__).parent.parent
 PHOTOS_DIR = PROJECT_ROOT / "photos"
 REFERENCE_DIR = PROJECT_ROOT / "reference"
 DATA_FILE = PROJECT_ROOT / "data" / "face_data.json"
+REFERENCE_CACHE_FILE = REFERENCE_DIR / ".cache.npz"
 
 # Configuration
-FACE_DETECTION_MODEL = "hog"  # "hog" is faster, "cnn" is more accurate
+USE_CUDA = getattr(dlib, "DLIB_USE_CUDA", False)  # CUDA builds of dlib detect faces on the GPU
+FACE_DETECTION_MODEL = "cnn" if USE_CUDA else "hog"  # "hog" is faster on CPU, "cnn" is more accurate
+DETECTION_MAX_SIZE = 1024  # Longest side (px) of the copy used for face detection
 RECOGNITION_TOLERANCE = 0.6  # Lower = stricter matching (default 0.6)
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+SUPPORTED_SUFFIXES = tuple(SUPPORTED_EXTENSIONS)  # For str.endswith
+MAX_WORKERS = 1 if USE_CUDA else (os.cpu_count() or 1)  # Parallel processes (one GPU process on CUDA)
+BATCH_SIZE = 32 if USE_CUDA else 8  # Max photos per detector/encoder call
+BATCH_MAX_PIXELS = 48_000_000  # Pixels a worker holds decoded at once (~144 MB as RGB)
+EXTRACT_ROTATION_FOR_OTHERS = False  # Head pose for non-subject faces (unused by the app)
+LOADER_THREADS = 2  # Threads per worker decoding photos ahead of detection
+FINGERPRINT_BYTES = 64 * 1024  # Leading bytes hashed to recognize renamed photos
+
+# dlib models, loaded once per process and called directly rather than through
+# face_recognition's per-call wrappers
+face_detector = dlib.get_frontal_face_detector()
+pose_predictor_68_point = dlib.shape_predictor(face_recognition_models.pose_predictor_model_location())
+face_encoder = dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+
+
+def reference_fingerprint(reference_files: List[Path]) -> str:
+    """Fingerprint the reference photos by name, mtime and size."""
+    h = hashlib.blake2b(digest_size=16)
+    for path in sorted(reference_files):
+        st = path.stat()
+        h.update(f"{path.name}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return h.hexdigest()
+
+
+def face_rect(location: tuple) -> "dlib.rectangle":
+    """Convert a (top, right, bottom, left) location to a dlib rectangle."""
+    top, right, bottom, left = location
+    return dlib.rectangle(left, top, right, bottom)
+
+
+def load_image(path: Path) -> np.ndarray:
+    """Decode an image to an RGB array, using libjpeg-turbo for JPEGs when available."""
+    if HAS_TURBOJPEG and path.suffix.lower() in (".jpg", ".jpeg"):
+        try:
+            return turbo_jpeg.decode(path.read_bytes(), pixel_format=TJPF_RGB)
+        except Exception:
+            pass  # Unusual JPEGs (e.g. CMYK) go through PIL below
+    return face_recognition.load_image_file(str(path))
 
 
-def load_reference_encodings() -> List[np.ndarray]:
-    """Load face encodings from reference photos of the subject."""
+def photo_fingerprint(photo_path: Path) -> Optional[str]:
+    """Fingerprint a photo by size and leading bytes so renamed copies can be matched."""
+    try:
+        with open(photo_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(FINGERPRINT_BYTES)
+    except OSError:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    h.update(head)
+    return h.hexdigest()
+
+
+def load_reference_encodings() -> np.ndarray:
+    """Load face encodings from reference photos of the subject as an (N, 128) array."""
     encodings = []
     reference_files = list(REFERENCE_DIR.glob("*"))
     reference_files = [f for f in reference_files if f.suffix.lower() in SUPPORTED_EXTENSIONS]
@@ -42,48 +121,154 @@ def load_reference_encodings() -> List[np.ndarray]:
     if not reference_files:
         print(f"Warning: No reference photos found in {REFERENCE_DIR}")
         print("Please add 1-3 clear photos of the subject to the reference/ folder")
-        return encodings
+        return np.empty((0, 128), np.float32)
+
+    # Reuse encodings from the last run if the reference photos haven't changed
+    fingerprint = reference_fingerprint(reference_files)
+    try:
+        with np.load(REFERENCE_CACHE_FILE) as cache:
+            if str(cache["fingerprint"]) == fingerprint:
+                print(f"Loaded {len(cache['encodings'])} cached reference encoding(s)")
+                return cache["encodings"].astype(np.float32)
+    except Exception:
+        pass  # Missing or unreadable cache: recompute below
 
     print(f"Loading {len(reference_files)} reference photo(s)...")
 
     for ref_path in reference_files:
         try:
-            image = face_recognition.load_image_file(str(ref_path))
-            face_encodings = face_recognition.face_encodings(image)
-            if face_encodings:
-                encodings.append(face_encodings[0])
+            # Same 68-point shapes + encoder path as the photos, so distances compare like for like
+            image = load_image(ref_path)
+            face_locations = locate_faces(image)
+            if face_locations:
+                shape = pose_predictor_68_point(image, face_rect(face_locations[0]))
+                encodings.append(np.array(face_encoder.compute_face_descriptor(image, shape, 1)))
                 print(f"  - Loaded encoding from {ref_path.name}")
             else:
                 print(f"  - Warning: No face found in {ref_path.name}")
         except Exception as e:
             print(f"  - Error loading {ref_path.name}: {e}")
 
-    return encodings
+    # Stored as float16 (well within the precision face matching needs) and used
+    # as float32, so fresh and cached runs compare against identical values
+    encodings = np.stack(encodings).astype(np.float16) if encodings else np.empty((0, 128), np.float16)
+    try:
+        np.savez(REFERENCE_CACHE_FILE, fingerprint=fingerprint, encodings=encodings)
+    except OSError as e:
+        print(f"  - Warning: Could not cache reference encodings: {e}")
 
+    return encodings.astype(np.float32)
 
-def get_subject_confidence(face_encoding: np.ndarray, reference_encodings: List[np.ndarray]) -> float:
-    """Calculate confidence that a face is the subject based on reference encodings."""
-    if not reference_encodings:
-        return 0.0
 
-    # Calculate distances to all reference encodings
-    distances = face_recognition.face_distance(reference_encodings, face_encoding)
+def closest_subject_face(face_encodings: np.ndarray, reference_encodings: np.ndarray) -> tuple:
+    """Find the face closest to any reference. Returns (face_index, confidence)."""
+    # Squared distances to every reference as one matrix product:
+    # |e - r|^2 = |e|^2 + |r|^2 - 2 e.r
+    sq_distances = (
+        np.einsum("ij,ij->i", face_encodings, face_encodings)[:, None]
+        + np.einsum("ij,ij->i", reference_encodings, reference_encodings)[None, :]
+        - 2 * (face_encodings @ reference_encodings.T)
+    ).min(axis=1)
+
+    # Confidence falls with distance, so the closest face is the most confident one
+    index = int(sq_distances.argmin())
+    min_distance = float(np.sqrt(max(sq_distances[index], 0.0)))
 
     # Convert distance to confidence (0-1 scale)
     # Distance of 0 = perfect match (confidence 1.0)
     # Distance of 0.6 = threshold (confidence ~0.5)
     # Distance of 1.0+ = no match (confidence ~0)
-    min_distance = min(distances)
-    confidence = max(0, 1 - (min_distance / RECOGNITION_TOLERANCE) * 0.5)
-
-    return round(confidence, 3)
+    return index, max(0.0, 1 - (min_distance / RECOGNITION_TOLERANCE) * 0.5)
+
+
+def shape_to_landmarks(shape) -> dict:
+    """Group a 68-point dlib shape into named landmarks (same layout as face_recognition)."""
+    points = [[p.x, p.y] for p in shape.parts()]
+    return {
+        "chin": points[0:17],
+        "left_eyebrow": points[17:22],
+        "right_eyebrow": points[22:27],
+        "nose_bridge": points[27:31],
+        "nose_tip": points[31:36],
+        "left_eye": points[36:42],
+        "right_eye": points[42:48],
+        "top_lip": points[48:55] + [points[64], points[63], points[62], points[61], points[60]],
+        "bottom_lip": points[54:60] + [points[48], points[60], points[67], points[66], points[65], points[64]]
+    }
 
 
-def process_photo(
-    photo_path: Path,
-    reference_encodings: List[np.ndarray]
-) -> dict:
-    """Process a single photo and extract face data."""
+def detect_locations(image: np.ndarray) -> list:
+    """Run the face detector and return (top, right, bottom, left) tuples within the image."""
+    if FACE_DETECTION_MODEL != "hog":
+        return face_recognition.face_locations(image, model=FACE_DETECTION_MODEL)
+
+    height, width = image.shape[:2]
+    return [
+        (max(r.top(), 0), min(r.right(), width), min(r.bottom(), height), max(r.left(), 0))
+        for r in face_detector(image, 1)
+    ]
+
+
+def downscale_for_detection(image: np.ndarray) -> tuple:
+    """Shrink an image to DETECTION_MAX_SIZE for detection. Returns (small, sx, sy)."""
+    height, width = image.shape[:2]
+    scale = DETECTION_MAX_SIZE / max(width, height)
+    if scale >= 1.0:
+        return image, 1.0, 1.0
+
+    small_width, small_height = max(1, round(width * scale)), max(1, round(height * scale))
+    small = cv2.resize(image, (small_width, small_height), interpolation=cv2.INTER_AREA)
+    return small, width / small_width, height / small_height
+
+
+def scale_locations(face_locations: list, sx: float, sy: float, width: int, height: int) -> list:
+    """Map (top, right, bottom, left) locations from a downscaled copy back to full-res pixels."""
+    if sx == 1.0 and sy == 1.0:
+        return face_locations
+    return [
+        (
+            max(0, round(top * sy)),
+            min(width, round(right * sx)),
+            min(height, round(bottom * sy)),
+            max(0, round(left * sx))
+        )
+        for top, right, bottom, left in face_locations
+    ]
+
+
+def locate_faces(image: np.ndarray) -> list:
+    """Find faces on a downscaled copy and return (top, right, bottom, left) in full-res pixels."""
+    height, width = image.shape[:2]
+    small, sx, sy = downscale_for_detection(image)
+
+    # Landmarks and encodings still run on the original image at these coordinates
+    return scale_locations(detect_locations(small), sx, sy, width, height)
+
+
+def batch_locate_faces(images: list) -> list:
+    """Locate faces in several images with the CNN detector, one GPU batch per image size."""
+    # dlib's batched CNN detector needs equally sized images, so group by shape
+    groups = {}
+    for i, image in enumerate(images):
+        if image is not None:
+            small, sx, sy = downscale_for_detection(image)
+            groups.setdefault(small.shape, []).append((i, small, sx, sy))
+
+    locations_list = [None] * len(images)
+    for group in groups.values():
+        batch_locations = face_recognition.batch_face_locations(
+            [small for _, small, _, _ in group],
+            number_of_times_to_upsample=1,
+            batch_size=len(group)
+        )
+        for (i, _, sx, sy), face_locations in zip(group, batch_locations):
+            height, width = images[i].shape[:2]
+            locations_list[i] = scale_locations(face_locations, sx, sy, width, height)
+    return locations_list
+
+
+def load_photo(photo_path: Path) -> tuple:
+    """Load a photo and set up its result entry. Returns (result, image); image is None on error."""
     result = {
         "filename": photo_path.name,
         "metadata": extract_metadata(photo_path),
@@ -105,77 +290,131 @@ def process_photo(
 
     try:
         # Load image
-        image = face_recognition.load_image_file(str(photo_path))
+        image = load_image(photo_path)
         height, width = image.shape[:2]
 
         # Update metadata with actual dimensions (in case EXIF was wrong)
         result["metadata"]["width"] = width
         result["metadata"]["height"] = height
+        return result, image
 
-        # Detect faces
-        face_locations = face_recognition.face_locations(image, model=FACE_DETECTION_MODEL)
-        face_encodings = face_recognition.face_encodings(image, face_locations)
-        face_landmarks = face_recognition.face_landmarks(image, face_locations)
+    except Exception as e:
+        result["processing_error"] = str(e)
+        return result, None
 
+
+def find_face_shapes(
+    result: dict,
+    image: Optional[np.ndarray],
+    face_locations: Optional[list] = None,
+    need_shapes: bool = True
+) -> tuple:
+    """Locate faces (unless already located) and their 68-point shapes. Returns (face_locations, shapes).
+
+    With need_shapes=False the shape predictor is skipped and shapes are None.
+    """
+    if image is None:
+        return [], []
+
+    try:
+        if face_locations is None:
+            face_locations = locate_faces(image)
+
+        # The 68-point shapes feed both landmarks and the encoder
+        if need_shapes:
+            shapes = [pose_predictor_68_point(image, face_rect(loc)) for loc in face_locations]
+        else:
+            shapes = [None] * len(face_locations)
         result["faces"]["total_count"] = len(face_locations)
+        return face_locations, shapes
+
+    except Exception as e:
+        result["processing_error"] = str(e)
+        return [], []
+
+
+def encode_batch(images: list, shapes_list: list) -> List[List[np.ndarray]]:
+    """Compute face encodings for several images in one encoder call."""
+    # Only images with faces go to dlib; the rest get an empty list
+    indices = [i for i, shapes in enumerate(shapes_list) if shapes]
+    encodings = [[] for _ in images]
+    if indices:
+        descriptors = face_encoder.compute_face_descriptor(
+            [images[i] for i in indices],
+            [dlib.full_object_detections(shapes_list[i]) for i in indices],
+            1
+        )
+        for i, faces in zip(indices, descriptors):
+            encodings[i] = [np.array(d) for d in faces]
+    return encodings
+
 
-        if not face_locations:
-            return result
+def finish_photo(
+    result: dict,
+    face_locations: list,
+    shapes: list,
+    face_encodings: List[np.ndarray],
+    reference_encodings: np.ndarray
+) -> dict:
+    """Identify the subject and fill in per-face data for a detected photo."""
+    if not face_locations:
+        return result
+
+    try:
+        width = result["metadata"]["width"]
+        height = result["metadata"]["height"]
 
         # Find subject among detected faces
         subject_index = -1
         subject_confidence = 0.0
 
-        if reference_encodings:
-            for i, encoding in enumerate(face_encodings):
-                confidence = get_subject_confidence(encoding, reference_encodings)
-                if confidence > subject_confidence and confidence > 0.4:  # Minimum threshold
-                    subject_confidence = confidence
-                    subject_index = i
+        if len(reference_encodings) and face_encodings:
+            best, confidence = closest_subject_face(np.asarray(face_encodings), reference_encodings)
+            if confidence > 0.4:  # Minimum threshold
+                subject_confidence = confidence
+                subject_index = best
+
+        # Box geometry for all faces at once; columns are (top, right, bottom, left)
+        locations = np.asarray(face_locations, dtype=np.int64).reshape(-1, 4)
+        tops, rights, bottoms, lefts = locations.T
+        face_widths = rights - lefts
+        face_heights = bottoms - tops
+        geometry = zip(
+            lefts.tolist(), tops.tolist(), face_widths.tolist(), face_heights.tolist(),
+            ((lefts + rights) // 2).tolist(), ((tops + bottoms) // 2).tolist(),
+            np.round(face_widths / width, 4).tolist(), np.round(face_heights / height, 4).tolist()
+        )
 
         # Process each face
-        for i, (location, landmarks) in enumerate(zip(face_locations, face_landmarks)):
-            top, right, bottom, left = location
-
-            # Create bounding box
-            bbox = {
-                "x": left,
-                "y": top,
-                "width": right - left,
-                "height": bottom - top
-            }
-
-            # Calculate center
-            center = {
-                "x": (left + right) // 2,
-                "y": (top + bottom) // 2
-            }
-
-            # Calculate scale
-            face_width = right - left
+        for i, (shape, (x, y, face_width, face_height, cx, cy, rel_width, rel_height)) in enumerate(
+            zip(shapes, geometry)
+        ):
+            bbox = {"x": x, "y": y, "width": face_width, "height": face_height}
+            center = {"x": cx, "y": cy}
             scale = {
-                "relative_width": round(face_width / width, 4),
-                "relative_height": round((bottom - top) / height, 4),
+                "relative_width": rel_width,
+                "relative_height": rel_height,
                 "face_width_px": face_width,
-                "face_height_px": bottom - top
+                "face_height_px": face_height
             }
 
-            # Calculate rotation
-            rotation = calculate_rotation(landmarks, width, height)
-
             if i == subject_index:
                 # This is the subject
+                landmarks = shape_to_landmarks(shape)
                 result["faces"]["subject"] = {
                     "detected": True,
                     "confidence": subject_confidence,
                     "bounding_box": bbox,
                     "center": center,
                     "scale": scale,
-                    "rotation": rotation,
+                    "rotation": calculate_rotation(landmarks, width, height),
                     "landmarks": landmarks
                 }
             else:
-                # Other person
+                # Other person; rotation only if configured (nothing downstream reads it)
+                rotation = None
+                if EXTRACT_ROTATION_FOR_OTHERS:
+                    rotation = calculate_rotation(shape_to_landmarks(shape), width, height)
                 result["faces"]["others"].append({
                     "id": len(result["faces"]["others"]) + 1,
                     "bounding_box": bbox,
@@ -190,13 +429,96 @@ def process_photo(
     return result
 
 
+def process_batch(
+    photo_paths: List[Path],
+    reference_encodings: np.ndarray
+) -> List[dict]:
+    """Process a batch of photos, running the face encoder once for the whole batch."""
+    # Without references no face can be the subject, so shapes are only needed
+    # for the rotation of other faces and the encoder can be skipped entirely
+    has_references = len(reference_encodings) > 0
+    need_shapes = has_references or EXTRACT_ROTATION_FOR_OTHERS
+
+    # Decode photos in background threads (PIL releases the GIL) so the next
+    # image is ready while the current one goes through detection
+    with ThreadPoolExecutor(max_workers=LOADER_THREADS) as loader:
+        pending = [loader.submit(load_photo, path) for path in photo_paths]
+
+        if USE_CUDA:
+            # On CUDA builds of dlib the CNN detector runs over the whole batch on the GPU
+            loaded = [future.result() for future in pending]
+            images = [image for _, image in loaded]
+            locations_list = [None] * len(images)
+            try:
+                locations_list = batch_locate_faces(images)
+            except Exception as e:
+                print(f"Batched GPU detection failed, detecting per photo: {e}")
+            detected = [
+                (result, image, *find_face_shapes(result, image, face_locations, need_shapes))
+                for (result, image), face_locations in zip(loaded, locations_list)
+            ]
+        else:
+            detected = [
+                (result, image, *find_face_shapes(result, image, None, need_shapes))
+                for result, image in (future.result() for future in pending)
+            ]
+
+    images = [image for _, image, _, _ in detected]
+    shapes_list = [shapes for _, _, _, shapes in detected]
+
+    try:
+        encodings = encode_batch(images, shapes_list) if has_references else [[] for _ in images]
+    except Exception as e:
+        # Fall back to per-photo errors so one bad batch is still reported
+        for result, image, _, _ in detected:
+            if image is not None:
+                result["processing_error"] = str(e)
+        return [result for result, _, _, _ in detected]
+
+    return [
+        finish_photo(result, face_locations, shapes, face_encs, reference_encodings)
+        for (result, _, face_locations, shapes), face_encs in zip(detected, encodings)
+    ]
+
+
+def image_pixels(photo_path: Path) -> int:
+    """Pixel count from the image header (no decode), or 0 if it can't be read."""
+    try:
+        with Image.open(photo_path) as img:
+            width, height = img.size
+        return width * height
+    except Exception:
+        return 0
+
+
+def split_batches(photo_paths: List[Path]) -> List[List[Path]]:
+    """
+    Split photos into batches small enough that every worker gets one, and
+    whose decoded images stay within BATCH_MAX_PIXELS (at least one photo each).
+    """
+    batch_size = max(1, min(BATCH_SIZE, math.ceil(len(photo_paths) / MAX_WORKERS)))
+    batches = []
+    batch, batch_pixels = [], 0
+    for photo_path in photo_paths:
+        pixels = image_pixels(photo_path)
+        if batch and (len(batch) >= batch_size or batch_pixels + pixels > BATCH_MAX_PIXELS):
+            batches.append(batch)
+            batch, batch_pixels = [], 0
+        batch.append(photo_path)
+        batch_pixels += pixels
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 def load_existing_data() -> dict:
     """Load existing face_data.json if it exists."""
     if DATA_FILE.exists():
         try:
-            with open(DATA_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            # Parse straight from bytes, skipping the text decode step
+            raw = DATA_FILE.read_bytes()
+            return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        except (ValueError, OSError) as e:  # Decode errors from json/orjson are ValueErrors
             print(f"Warning: Could not load existing data: {e}")
     return None
 
@@ -228,26 +550,31 @@ def main():
     existing_data = load_existing_data()
     existing_data = migrate_face_data(existing_data)
     existing_photos = {}
+    existing_by_fingerprint = {}
     existing_birthdate = None
     if existing_data:
         for photo in existing_data.get("photos", []):
             existing_photos[photo.get("filename")] = photo
+            if photo.get("_fp"):
+                existing_by_fingerprint[photo["_fp"]] = photo
         existing_birthdate = existing_data.get("birthDate")
         print(f"\nLoaded existing data with {len(existing_photos)} photos")
 
     # Load reference encodings
     reference_encodings = load_reference_encodings()
-    if not reference_encodings:
+    if not len(reference_encodings):
         print("\nNo reference photos found. Will detect faces but cannot identify subject.")
         print("Add photos to reference/ folder and run again.\n")
 
-    # Get all photos
+    # Get all photos in one pass over the folder (extension match is case-insensitive)
     photo_files = []
-    for ext in SUPPORTED_EXTENSIONS:
-        photo_files.extend(PHOTOS_DIR.glob(f"*{ext}"))
-        photo_files.extend(PHOTOS_DIR.glob(f"*{ext.upper()}"))
-
-    photo_files = sorted(set(photo_files))
+    if PHOTOS_DIR.is_dir():
+        with os.scandir(PHOTOS_DIR) as entries:
+            photo_files = sorted(
+                Path(entry.path) for entry in entries
+                if entry.name.lower().endswith(SUPPORTED_SUFFIXES)
+                and entry.is_file()
+            )
     photo_filenames = {p.name for p in photo_files}
     print(f"Found {len(photo_files)} photos in folder")
 
@@ -264,6 +591,24 @@ def main():
 
     # Filter to only new photos
     new_photos = [p for p in photo_files if p.name not in existing_photos]
+
+    # Photos that were renamed or copied keep their earlier results (and manual edits)
+    fingerprints = {}
+    reused_count = 0
+    for photo_path in new_photos:
+        fingerprint = photo_fingerprint(photo_path)
+        cached = existing_by_fingerprint.get(fingerprint) if fingerprint else None
+        if cached:
+            photo_data = copy.deepcopy(cached)
+            photo_data["filename"] = photo_path.name
+            existing_photos[photo_path.name] = photo_data
+            reused_count += 1
+        else:
+            fingerprints[photo_path.name] = fingerprint
+    if reused_count:
+        print(f"Reusing results for {reused_count} renamed photo(s)")
+        new_photos = [p for p in new_photos if p.name not in existing_photos]
+
     skipped_count = len(photo_files) - len(new_photos)
 
     if skipped_count > 0:
@@ -272,46 +617,65 @@ def main():
     # Start with existing photos (preserves manual edits)
     all_photos = list(existing_photos.values())
 
-    if not new_photos and not deleted_photos:
+    if not new_photos and not deleted_photos and not reused_count:
         print("\nNo changes. All photos already analyzed.")
         return
 
+    # Fingerprint photos analyzed before fingerprints were recorded
+    for name, photo in existing_photos.items():
+        if "_fp" not in photo:
+            photo["_fp"] = photo_fingerprint(PHOTOS_DIR / name)
+
     if new_photos:
         print(f"Processing {len(new_photos)} new photo(s)\n")
     new_processed = 0
 
-    for i, photo_path in enumerate(new_photos, 1):
-        print(f"[{i}/{len(new_photos)}] Processing {photo_path.name}...", end=" ")
-        try:
-            photo_data = process_photo(photo_path, reference_encodings)
-
-            # Convert landmarks to serializable format (tuples to lists)
-            if photo_data["faces"]["subject"]["landmarks"]:
-                landmarks = photo_data["faces"]["subject"]["landmarks"]
-                photo_data["faces"]["subject"]["landmarks"] = {
-                    k: [list(p) for p in v] for k, v in landmarks.items()
-                }
-
-            all_photos.append(photo_data)
-            new_processed += 1
-
-            # Status indicator
-            if photo_data["processing_error"]:
-                print("ERROR")
-            elif photo_data["faces"]["subject"]["detected"]:
-                conf = photo_data["faces"]["subject"]["confidence"]
-                print(f"Subject found (confidence: {conf:.2f})")
-            elif photo_data["faces"]["total_count"] > 0:
-                print(f"{photo_data['faces']['total_count']} face(s), subject not identified")
-            else:
-                print("No faces detected")
-
-        except Exception as e:
-            print(f"FAILED: {e}")
-            all_photos.append({
-                "filename": photo_path.name,
-                "processing_error": str(e)
-            })
+    # Each batch is independent CPU-bound work, so spread batches across processes.
+    # "spawn" avoids forking dlib state and behaves the same on every platform.
+    batches = split_batches(new_photos)
+    workers = max(1, min(MAX_WORKERS, len(batches)))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(process_batch, batch, reference_encodings)
+            for batch in batches
+        ]
+
+        # Report results in input order as they become available
+        i = 0
+        for batch, future in zip(batches, futures):
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                for photo_path in batch:
+                    i += 1
+                    print(f"[{i}/{len(new_photos)}] Processing {photo_path.name}... FAILED: {e}")
+                    all_photos.append({
+                        "filename": photo_path.name,
+                        "processing_error": str(e)
+                    })
+                continue
+
+            for photo_path, photo_data in zip(batch, batch_results):
+                i += 1
+                print(f"[{i}/{len(new_photos)}] Processing {photo_path.name}...", end=" ")
+
+                photo_data["_fp"] = fingerprints.get(photo_path.name)
+                all_photos.append(photo_data)
+                new_processed += 1
+
+                # Status indicator
+                if photo_data["processing_error"]:
+                    print("ERROR")
+                elif photo_data["faces"]["subject"]["detected"]:
+                    conf = photo_data["faces"]["subject"]["confidence"]
+                    print(f"Subject found (confidence: {conf:.2f})")
+                elif photo_data["faces"]["total_count"] > 0:
+                    print(f"{photo_data['faces']['total_count']} face(s), subject not identified")
+                else:
+                    print("No faces detected")
 
     # Build final results - preserve existing birthDate if present
     results = {
@@ -324,8 +688,13 @@ def main():
 
     # Write output
     DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(results, f, indent=2)
+    if HAS_ORJSON:
+        DATA_FILE.write_bytes(orjson.dumps(results, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        # One-shot dumps() without indent= runs on json's C encoder; dump() to a
+        # file always goes through the pure-Python iterencode
+        with open(DATA_FILE, "w") as f:
+            f.write(json.dumps(results, separators=(",", ":")))
 
     print(f"\nOutput written to: {DATA_FILE}")
 
@@ -9,51 +9,57 @@ from PIL import Image
 from PIL.ExifTags import TAGS
 
 
-def get_exif_date(image_path: Path) -> Optional[datetime]:
-    """Extract date from EXIF metadata."""
-    try:
-        with Image.open(image_path) as img:
-            exif_data = img._getexif()
-            if not exif_data:
-                return None
-
-            # Look for DateTimeOriginal (36867) or DateTime (306)
-            for tag_id, value in exif_data.items():
-                tag_name = TAGS.get(tag_id, tag_id)
-                if tag_name in ('DateTimeOriginal', 'DateTime', 'DateTimeDigitized'):
-                    if isinstance(value, str):
-                        # Format: "2023:12:26 23:04:42"
-                        try:
-                            return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
-                        except ValueError:
-                            continue
-    except Exception:
-        pass
+def _date_from_match(m: re.Match) -> datetime:
+    return datetime(int(m[1]), int(m[2]), int(m[3]))
+
+
+def _datetime_from_match(m: re.Match) -> datetime:
+    return datetime(int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5]), int(m[6]))
+
+
+# Filename date patterns, compiled once and tried in order. The literal marker
+# lets a pattern be skipped with a substring check when the name can't match.
+FILENAME_PATTERNS = [
+    # IMG_20231226_230442_992.jpg
+    ('IMG_', re.compile(r'IMG_(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})', re.ASCII), _datetime_from_match),
+    # IMG-20231227-WA0024.jpg (WhatsApp)
+    ('IMG-', re.compile(r'IMG-(\d{4})(\d{2})(\d{2})-WA', re.ASCII), _date_from_match),
+    # PXL_20231226_230442123.jpg (Pixel)
+    ('PXL_', re.compile(r'PXL_(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})', re.ASCII), _datetime_from_match),
+    # photo_2023-12-26_23-04-42.jpg
+    ('photo_', re.compile(r'photo_(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})', re.ASCII), _datetime_from_match),
+    # 2023-12-26 or 20231226
+    (None, re.compile(r'(\d{4})-?(\d{2})-?(\d{2})', re.ASCII), _date_from_match),
+]
+
+# Every pattern above contains a YYYY[-]MM[-]DD run, so a name without one can't match any
+ANY_DATE_PATTERN = FILENAME_PATTERNS[-1][1]
+
+
+def get_exif_date(exif_data: dict) -> Optional[datetime]:
+    """Extract date from already-parsed EXIF metadata."""
+    # Look for DateTimeOriginal (36867) or DateTime (306)
+    for tag_id, value in exif_data.items():
+        tag_name = TAGS.get(tag_id, tag_id)
+        if tag_name in ('DateTimeOriginal', 'DateTime', 'DateTimeDigitized'):
+            if isinstance(value, str):
+                # Format: "2023:12:26 23:04:42"
+                try:
+                    return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+                except ValueError:
+                    continue
     return None
 
 
 def parse_filename_date(filename: str) -> Optional[datetime]:
     """Parse date from common filename patterns."""
-    patterns = [
-        # IMG_20231226_230442_992.jpg
-        (r'IMG_(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})',
-         lambda m: datetime(int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5]), int(m[6]))),
-        # IMG-20231227-WA0024.jpg (WhatsApp)
-        (r'IMG-(\d{4})(\d{2})(\d{2})-WA',
-         lambda m: datetime(int(m[1]), int(m[2]), int(m[3]))),
-        # PXL_20231226_230442123.jpg (Pixel)
-        (r'PXL_(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})',
-         lambda m: datetime(int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5]), int(m[6]))),
-        # photo_2023-12-26_23-04-42.jpg
-        (r'photo_(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})',
-         lambda m: datetime(int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5]), int(m[6]))),
-        # 2023-12-26 or 20231226
-        (r'(\d{4})-?(\d{2})-?(\d{2})',
-         lambda m: datetime(int(m[1]), int(m[2]), int(m[3]))),
-    ]
-
-    for pattern, parser in patterns:
-        match = re.search(pattern, filename)
+    if not ANY_DATE_PATTERN.search(filename):
+        return None
+
+    for marker, pattern, parser in FILENAME_PATTERNS:
+        if marker and marker not in filename:
+            continue
+        match = pattern.search(filename)
         if match:
             try:
                 return parser(match)
@@ -72,26 +78,29 @@ def extract_metadata(image_path: Path) -> dict:
         "orientation": 1
     }
 
+    # Image.open only reads the header, so size and EXIF come from one pass
+    # over the file without decoding any pixels
+    exif_data = None
     try:
         with Image.open(image_path) as img:
             result["width"], result["height"] = img.size
-
-            # Get orientation from EXIF
-            exif_data = img._getexif()
-            if exif_data:
-                for tag_id, value in exif_data.items():
-                    if TAGS.get(tag_id) == 'Orientation':
-                        result["orientation"] = value
-                        break
+            exif_data = img._getexif() if hasattr(img, "_getexif") else None
     except Exception:
         pass
 
-    # Try EXIF date first
-    exif_date = get_exif_date(image_path)
-    if exif_date:
-        result["date_taken"] = exif_date.isoformat()
-        result["date_source"] = "exif"
-        return result
+    if exif_data:
+        # Get orientation from EXIF
+        for tag_id, value in exif_data.items():
+            if TAGS.get(tag_id) == 'Orientation':
+                result["orientation"] = value
+                break
+
+        # Try EXIF date first
+        exif_date = get_exif_date(exif_data)
+        if exif_date:
+            result["date_taken"] = exif_date.isoformat()
+            result["date_source"] = "exif"
+            return result
 
     # Fall back to filename parsing
     filename_date = parse_filename_date(image_path.name)
@@ -1,5 +1,8 @@
 """Calculate head pose (roll, yaw, pitch) from facial landmarks."""
 
+import math
+from functools import lru_cache
+
 import numpy as np
 import cv2
 from typing import Dict, List, Optional, Tuple
@@ -17,16 +20,27 @@ MODEL_POINTS_3D = np.array([
     (150.0, -150.0, -125.0)      # Right mouth corner (landmark 54)
 ], dtype=np.float64)
 
+# Assuming no lens distortion
+DIST_COEFFS = np.zeros((4, 1))
+DIST_COEFFS.flags.writeable = False
+
 
+@lru_cache(maxsize=32)
 def get_camera_matrix(image_width: int, image_height: int) -> np.ndarray:
-    """Create a camera matrix assuming the camera is at the image center."""
+    """Create a camera matrix assuming the camera is at the image center.
+
+    Cached per resolution since photos tend to share a few sizes, so the
+    returned array is read-only.
+    """
     focal_length = image_width  # Approximate focal length
     center = (image_width / 2, image_height / 2)
-    return np.array([
+    camera_matrix = np.array([
         [focal_length, 0, center[0]],
         [0, focal_length, center[1]],
         [0, 0, 1]
     ], dtype=np.float64)
+    camera_matrix.flags.writeable = False
+    return camera_matrix
 
 
 def extract_key_landmarks(landmarks: List[Tuple[int, int]]) -> Optional[np.ndarray]:
@@ -93,16 +107,17 @@ def calculate_rotation(
 
     # Camera parameters
     camera_matrix = get_camera_matrix(image_width, image_height)
-    dist_coeffs = np.zeros((4, 1))  # Assuming no lens distortion
 
     try:
-        # Solve for pose
+        # Solve for pose (SQPnP is non-iterative and finds the global optimum; unlike
+        # the iterative solver it never settles on a pose behind the camera, so angles
+        # stored by older scans can differ by ~180 degrees after a rescan)
         success, rotation_vector, translation_vector = cv2.solvePnP(
             MODEL_POINTS_3D,
             image_points,
             camera_matrix,
-            dist_coeffs,
-            flags=cv2.SOLVEPNP_ITERATIVE
+            DIST_COEFFS,
+            flags=cv2.SOLVEPNP_SQPNP
         )
 
         if not success:
@@ -113,21 +128,23 @@ def calculate_rotation(
 
         # Extract Euler angles from rotation matrix
         # Using the convention: R = Rz(yaw) * Ry(pitch) * Rx(roll)
-        sy = np.sqrt(rotation_matrix[0, 0] ** 2 + rotation_matrix[1, 0] ** 2)
+        # Plain floats + math are much cheaper than numpy calls on 9 scalars
+        (r00, _, _), (r10, r11, r12), (r20, r21, r22) = rotation_matrix.tolist()
+        sy = math.hypot(r00, r10)
 
         if sy > 1e-6:
-            roll = np.arctan2(rotation_matrix[2, 1], rotation_matrix[2, 2])
-            pitch = np.arctan2(-rotation_matrix[2, 0], sy)
-            yaw = np.arctan2(rotation_matrix[1, 0], rotation_matrix[0, 0])
+            roll = math.atan2(r21, r22)
+            pitch = math.atan2(-r20, sy)
+            yaw = math.atan2(r10, r00)
         else:
-            roll = np.arctan2(-rotation_matrix[1, 2], rotation_matrix[1, 1])
-            pitch = np.arctan2(-rotation_matrix[2, 0], sy)
-            yaw = 0
+            roll = math.atan2(-r12, r11)
+            pitch = math.atan2(-r20, sy)
+            yaw = 0.0
 
         # Convert to degrees
-        result["roll"] = float(np.degrees(roll))
-        result["yaw"] = float(np.degrees(yaw))
-        result["pitch"] = float(np.degrees(pitch))
+        result["roll"] = math.degrees(roll)
+        result["yaw"] = math.degrees(yaw)
+        result["pitch"] = math.degrees(pitch)
 
     except Exception as e:
         pass
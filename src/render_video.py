@@ -8,8 +8,13 @@ import json
 import math
 import os
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from fractions import Fraction
+from functools import lru_cache
 from pathlib import Path
 
 import cv2
@@ -23,11 +28,32 @@ try:
 except ImportError:
     HAS_PYAV = False
 
+# Use OpenCV's CUDA module for warping when built with it and a GPU is present
+try:
+    HAS_CUDA = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    HAS_CUDA = False
+
 PROJECT_ROOT = Path(__file__).parent.parent
 PHOTOS_DIR = PROJECT_ROOT / "photos"
 FACE_DATA_PATH = PROJECT_ROOT / "data" / "face_data.json"
 RENDER_LOG_PATH = PROJECT_ROOT / "data" / "render.log"
 
+PREFETCH_PHOTOS = 3  # Photos decoded ahead of the one being rendered
+AGE_GLYPHS = "0123456789.-"  # Every character f"{age:.2f}" can produce
+NVENC_OPTIONS = {"preset": "p4", "rc": "vbr", "cq": "19"}  # h264_nvenc quality settings
+LOG_FLUSH_INTERVAL = 1.0  # Max seconds a render log line stays buffered
+
+MIN_WARP_SCALE = 0.6  # Photos shrunk further than this are INTER_AREA-resized before warping
+
+# imread flags per decode reduction (libjpeg scales JPEGs down in the DCT domain)
+IMREAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
 
 # Render state for progress tracking
 render_state = {
@@ -45,24 +71,172 @@ render_state = {
     "cancelled": False
 }
 
+# Guards the running check in claim_render(), requests run on parallel threads
+_render_lock = threading.Lock()
+
+# Render log handle, held open (and flushed at least every LOG_FLUSH_INTERVAL)
+# while a render runs
+_log_file = None
+_log_flush_timer = None
+_log_lock = threading.Lock()
+
+
+def open_log():
+    """Truncate the render log and keep it open for the rest of the render."""
+    global _log_file
+    with _log_lock:
+        _log_file = open(RENDER_LOG_PATH, "w", buffering=8192)
+
+
+def flush_log():
+    """Flush buffered render log lines (run by the timer log() schedules)."""
+    global _log_flush_timer
+    with _log_lock:
+        _log_flush_timer = None
+        if _log_file is not None:
+            _log_file.flush()
+
+
+def close_log():
+    """Flush and close the render log opened by open_log()."""
+    global _log_file, _log_flush_timer
+    with _log_lock:
+        if _log_flush_timer is not None:
+            _log_flush_timer.cancel()
+            _log_flush_timer = None
+        if _log_file is not None:
+            _log_file.close()
+            _log_file = None
+
 
 def log(message):
     """Write to render log file."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    line = f"[{timestamp}] {message}\n"
-    with open(RENDER_LOG_PATH, "a") as f:
-        f.write(line)
+    global _log_flush_timer
+    line = f"[{time.strftime('%H:%M:%S')}] {message}\n"
+    with _log_lock:
+        if _log_file is None:
+            with open(RENDER_LOG_PATH, "a") as f:
+                f.write(line)
+        else:
+            _log_file.write(line)
+            # Lines written in a burst reach the file once the interval passes,
+            # even if nothing else is logged for a while
+            if _log_flush_timer is None:
+                _log_flush_timer = threading.Timer(LOG_FLUSH_INTERVAL, flush_log)
+                _log_flush_timer.daemon = True
+                _log_flush_timer.start()
     print(line, end="")
 
 
+@lru_cache(maxsize=None)
+def has_nvenc():
+    """Check once whether PyAV's FFmpeg can actually open NVIDIA's H.264 encoder."""
+    if not HAS_PYAV:
+        return False
+    ctx = None
+    try:
+        # FFmpeg may be built with nvenc on a machine without an NVIDIA GPU,
+        # so open a tiny encoder rather than just looking the codec up, with
+        # the same options add_h264_stream() will use
+        ctx = av.CodecContext.create("h264_nvenc", "w")
+        ctx.width = 256
+        ctx.height = 256
+        ctx.pix_fmt = "yuv420p"
+        ctx.time_base = Fraction(1, 30)
+        ctx.options = dict(NVENC_OPTIONS)
+        ctx.open()
+        return True
+    except Exception:
+        return False
+    finally:
+        # PyAV frees the codec context (and its NVENC session) once unreferenced
+        del ctx
+
+
+def add_h264_stream(container, fps, width, height):
+    """Add an H.264 stream to a PyAV container, on NVENC when available."""
+    if has_nvenc():
+        stream = container.add_stream("h264_nvenc", rate=fps)
+        stream.options = dict(NVENC_OPTIONS)
+    else:
+        stream = container.add_stream("h264", rate=fps)
+        # Quality-targeted x264; veryfast is far quicker than the default medium
+        # preset and stillimage suits a slideshow of held photos
+        stream.options = {"crf": "18", "preset": "veryfast", "tune": "stillimage"}
+        # Let FFmpeg pick frame/slice threading across all cores
+        stream.thread_type = "AUTO"
+        stream.thread_count = 0
+    stream.width = width
+    stream.height = height
+    stream.pix_fmt = "yuv420p"
+    return stream
+
+
+def add_prores_alpha_stream(container, fps, width, height):
+    """Add a ProRes 4444 stream with an 8-bit alpha channel to a PyAV container."""
+    stream = container.add_stream("prores_ks", rate=fps)
+    stream.options = {"profile": "4444", "alpha_bits": "8"}
+    stream.width = width
+    stream.height = height
+    stream.pix_fmt = "yuva444p10le"
+    return stream
+
+
+def wrap_video_frame(frame, pix_fmt="bgr24"):
+    """
+    Wrap a numpy frame as a PyAV VideoFrame without copying it where PyAV
+    supports that. Safe to reuse the array once encode() returns, since the
+    encoder converts the frame to its own YUV format (one swscale pass) right away.
+    Falls back to a copy when the array's layout can't be wrapped (from_numpy_buffer
+    raises ValueError, e.g. for a view whose rows aren't C-contiguous).
+    """
+    if hasattr(av.VideoFrame, "from_numpy_buffer"):
+        try:
+            return av.VideoFrame.from_numpy_buffer(frame, format=pix_fmt)
+        except ValueError:
+            pass
+    return av.VideoFrame.from_ndarray(frame, format=pix_fmt)
+
+
+def read_photo(filename, reduction=1):
+    """
+    Read a photo as BGR, decoded at 1/reduction of its size (see IMREAD_FLAGS).
+    Returns (found, img); img is None if it can't be decoded.
+    """
+    photo_path = PHOTOS_DIR / filename
+    if not photo_path.exists():
+        return False, None
+    return True, cv2.imread(str(photo_path), IMREAD_FLAGS[reduction])
+
+
+def prefetch_photos(photos, reductions):
+    """
+    Yield (photo, read_photo result) in order while the next PREFETCH_PHOTOS
+    photos are read in background threads (OpenCV decodes without the GIL).
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pending = deque()
+        for photo, reduction in zip(photos, reductions):
+            pending.append((photo, pool.submit(read_photo, photo.get("filename"), reduction)))
+            if len(pending) > PREFETCH_PHOTOS:
+                done_photo, future = pending.popleft()
+                yield done_photo, future.result()
+        while pending:
+            done_photo, future = pending.popleft()
+            yield done_photo, future.result()
+
+
 def get_capabilities():
     """Return available encoders and formats."""
     capabilities = {
         "has_pyav": HAS_PYAV,
+        "has_cuda": HAS_CUDA,
         "formats": ["mp4", "gif", "png_sequence"],
         "encoders": []
     }
 
+    if has_nvenc():
+        capabilities["encoders"].append("h264_nvenc (PyAV)")
     if HAS_PYAV:
         capabilities["encoders"].append("h264 (PyAV)")
 
@@ -79,7 +253,10 @@ def get_subject_data(photo):
 
 
 def get_face_points(landmarks):
-    """Get face anchor points from landmarks."""
+    """
+    Get face anchor points from landmarks as a (3, 2) array of
+    [left eye, right eye, mouth] centers.
+    """
     if not landmarks:
         return None
 
@@ -90,41 +267,45 @@ def get_face_points(landmarks):
     if not left_eye or not right_eye or not top_lip:
         return None
 
-    def avg(points):
-        x = sum(p[0] for p in points) / len(points)
-        y = sum(p[1] for p in points) / len(points)
-        return {"x": x, "y": y}
-
-    return {
-        "leftEye": avg(left_eye),
-        "rightEye": avg(right_eye),
-        "mouth": avg(top_lip)
-    }
+    return np.array([
+        np.mean(left_eye, axis=0),
+        np.mean(right_eye, axis=0),
+        np.mean(top_lip, axis=0)
+    ])
 
 
-def calculate_age(photo_date, birth_date):
-    """Calculate age in years from photo date and birth date."""
-    if not photo_date or not birth_date:
-        return None
-
+def calculate_ages(photo_dates, birth_date):
+    """
+    Calculate ages in years from photo dates and birth date, parsing the birth
+    date once. Returns a list with None where an age can't be determined.
+    """
     try:
-        photo_dt = datetime.fromisoformat(photo_date.replace("Z", "+00:00"))
-        birth_dt = datetime.fromisoformat(birth_date)
-
-        diff = photo_dt - birth_dt
-        years = diff.total_seconds() / (365.25 * 24 * 60 * 60)
-        return years
+        birth_dt = datetime.fromisoformat(birth_date) if birth_date else None
     except (ValueError, TypeError):
-        return None
-
-
-def compute_similarity_transform(src_points, viewport_width, viewport_height,
+        birth_dt = None
+
+    ages = []
+    for photo_date in photo_dates:
+        if not photo_date or birth_dt is None:
+            ages.append(None)
+            continue
+        try:
+            photo_dt = datetime.fromisoformat(photo_date.replace("Z", "+00:00"))
+            diff = photo_dt - birth_dt
+            ages.append(diff.total_seconds() / (365.25 * 24 * 60 * 60))
+        except (ValueError, TypeError):
+            ages.append(None)
+    return ages
+
+
+def compute_similarity_transforms(src_points, viewport_width, viewport_height,
                                   target_face_width, do_scale, do_rotate, angle_offset):
     """
-    Compute 2x3 affine transform matrix.
+    Compute 2x3 affine transform matrices for a stack of get_face_points()
+    outputs (shape (N, 3, 2)), all at once.
     Same math as preview.js computeSimilarityTransform().
 
-    Returns a 2x3 matrix for cv2.warpAffine.
+    Returns an (N, 2, 3) stack of matrices for cv2.warpAffine.
     """
     cx = viewport_width / 2
     cy = viewport_height / 2
@@ -132,35 +313,122 @@ def compute_similarity_transform(src_points, viewport_width, viewport_height,
     # Convert angle offset from degrees to radians
     angle_offset_rad = angle_offset * math.pi / 180
 
+    left = src_points[:, 0]
+    right = src_points[:, 1]
+
     # Calculate eye distance and angle
-    src_dx = src_points["rightEye"]["x"] - src_points["leftEye"]["x"]
-    src_dy = src_points["rightEye"]["y"] - src_points["leftEye"]["y"]
-    src_dist = math.sqrt(src_dx * src_dx + src_dy * src_dy)
-    src_angle = math.atan2(src_dy, src_dx)
+    src_dx = right[:, 0] - left[:, 0]
+    src_dy = right[:, 1] - left[:, 1]
+    src_dist = np.hypot(src_dx, src_dy)
+    src_angle = np.arctan2(src_dy, src_dx)
 
     # Compute scale and rotation
-    scale = target_face_width / src_dist if do_scale else 1.0
-    rotation = angle_offset_rad - src_angle if do_rotate else angle_offset_rad
+    scale = target_face_width / src_dist if do_scale else np.ones_like(src_dist)
+    rotation = angle_offset_rad - src_angle if do_rotate else np.full_like(src_angle, angle_offset_rad)
 
     # Build transform components
-    cos_r = math.cos(rotation) * scale
-    sin_r = math.sin(rotation) * scale
+    cos_r = np.cos(rotation) * scale
+    sin_r = np.sin(rotation) * scale
 
     # Source midpoint (between eyes)
-    src_mid_x = (src_points["leftEye"]["x"] + src_points["rightEye"]["x"]) / 2
-    src_mid_y = (src_points["leftEye"]["y"] + src_points["rightEye"]["y"]) / 2
+    src_mid_x = (left[:, 0] + right[:, 0]) / 2
+    src_mid_y = (left[:, 1] + right[:, 1]) / 2
 
     # Translation to center
     tx = cx - (cos_r * src_mid_x - sin_r * src_mid_y)
     ty = cy - (sin_r * src_mid_x + cos_r * src_mid_y)
 
-    # Return 2x3 matrix for cv2.warpAffine
-    return np.array([
-        [cos_r, -sin_r, tx],
-        [sin_r, cos_r, ty]
-    ], dtype=np.float32)
+    # Stack into (N, 2, 3) matrices for cv2.warpAffine
+    return np.stack([
+        np.stack([cos_r, -sin_r, tx], axis=-1),
+        np.stack([sin_r, cos_r, ty], axis=-1)
+    ], axis=1).astype(np.float32)
+
+
+def reduce_transforms(transforms):
+    """
+    Pick the largest decode reduction for each photo that still leaves at least
+    one decoded pixel per output pixel, and rewrite its transform (in place)
+    to take coordinates in the reduced image.
+    Returns the reduction factor per photo.
+    """
+    scales = np.hypot(transforms[:, 0, 0], transforms[:, 1, 0])
+    reductions = np.ones(len(transforms), dtype=np.int64)
+    for factor in (2, 4, 8):
+        reductions[scales * factor <= 1] = factor
+
+    # Reduced pixel p covers full pixels [p * r, p * r + r), centered on p * r + (r - 1) / 2
+    offsets = (reductions - 1) / 2
+    transforms[:, :, 2] += (transforms[:, :, 0] + transforms[:, :, 1]) * offsets[:, None]
+    transforms[:, :, :2] *= reductions[:, None, None]
+    return reductions.tolist()
 
 
+def prefilter_photo(img, transform_matrix):
+    """
+    Shrink a photo with INTER_AREA when the warp would still scale it below
+    MIN_WARP_SCALE (e.g. beyond the 8x decode reduction), since warpAffine's
+    bilinear sampling skips pixels and aliases at that point.
+    Returns (img, transform_matrix), the matrix adjusted to the smaller image.
+    """
+    scale = math.hypot(transform_matrix[0, 0], transform_matrix[1, 0])
+    if scale >= MIN_WARP_SCALE:
+        return img, transform_matrix
+
+    height, width = img.shape[:2]
+    small_width, small_height = max(1, round(width * scale)), max(1, round(height * scale))
+    small = cv2.resize(img, (small_width, small_height), interpolation=cv2.INTER_AREA)
+
+    # Small pixel p is centered on p * s + (s - 1) / 2 in the original
+    sx, sy = width / small_width, height / small_height
+    adjusted = transform_matrix.copy()
+    adjusted[:, 2] += transform_matrix[:, 0] * (sx - 1) / 2 + transform_matrix[:, 1] * (sy - 1) / 2
+    adjusted[:, 0] *= sx
+    adjusted[:, 1] *= sy
+    return small, adjusted
+
+
+def warp_photo(img, transform_matrix, width, height, dst=None):
+    """
+    Warp a photo into the output frame, on the GPU when CUDA is available.
+    Writes into dst (height x width x 3 uint8) when given, to reuse its memory.
+    """
+    if HAS_CUDA:
+        try:
+            gpu_img = cv2.cuda_GpuMat()
+            gpu_img.upload(img)
+            gpu_frame = cv2.cuda.warpAffine(gpu_img, transform_matrix, (width, height),
+                                            borderMode=cv2.BORDER_CONSTANT,
+                                            borderValue=(0, 0, 0))
+            return gpu_frame.download(dst)
+        except cv2.error:
+            pass  # Fall back to the CPU path (e.g. GPU out of memory)
+
+    return cv2.warpAffine(img, transform_matrix, (width, height), dst=dst,
+                          borderMode=cv2.BORDER_CONSTANT,
+                          borderValue=(0, 0, 0))
+
+
+def stack_blur_kernel_size(blur_amount):
+    """
+    Get the stack blur kernel size that blurs as much as the Gaussian kernel of
+    size blur_amount * 2 + 1 did. A stack of radius r has sigma sqrt(r(r+2)/6),
+    wider than OpenCV's default Gaussian sigma 0.3 * (radius - 1) + 0.8.
+    """
+    sigma = 0.3 * (blur_amount - 1) + 0.8
+    radius = max(1, round(math.sqrt(1 + 6 * sigma * sigma) - 1))
+    return radius * 2 + 1
+
+
+def blur_frame(frame, kernel_size, dst=None):
+    """
+    Blur a frame with stack blur, whose cost doesn't grow with the kernel size
+    (requirements pin OpenCV 4.8+, where cv2.stackBlur always exists).
+    """
+    return cv2.stackBlur(frame, (kernel_size, kernel_size), dst=dst)
+
+
+@lru_cache(maxsize=16)
 def get_age_font(width, height):
     """Get the font for age overlay."""
     font_size = int(min(width, height) * 0.08)  # 8% of smaller dimension
@@ -179,43 +447,122 @@ def get_age_font(width, height):
         return ImageFont.load_default()
 
 
-def render_age_overlay(frame, age, width, height):
+@lru_cache(maxsize=16)
+def get_age_glyphs(width, height):
     """
-    Render age text overlay on frame using Pillow.
-    Returns frame with age overlay.
+    Rasterize each character of AGE_GLYPHS once, so age labels can be composed
+    with numpy instead of laying out text with Pillow for every new age.
+    Returns {char: (alpha, left, top, advance)} where alpha is a float32 mask of
+    the glyph's bounding box and (left, top) its offset from the pen position.
     """
-    if age is None:
-        return frame
-
-    # Convert BGR to RGB for Pillow
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(frame_rgb)
-    draw = ImageDraw.Draw(pil_image)
-
-    age_text = f"{age:.2f}"
     font = get_age_font(width, height)
+    glyphs = {}
+    for char in AGE_GLYPHS:
+        left, top, right, bottom = font.getbbox(char)
+        mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+        glyphs[char] = (np.asarray(mask, dtype=np.float32) / 255, left, top, font.getlength(char))
+    return glyphs
 
-    # Get text bounding box
-    bbox = draw.textbbox((0, 0), age_text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
+
+def compose_age_text(age_text, width, height):
+    """
+    Blit the cached glyphs for age_text into one alpha mask.
+    Returns (alpha, left, top), the mask's offset from where the text is drawn,
+    matching font.getbbox(age_text).
+    """
+    glyphs = get_age_glyphs(width, height)
+    placed = []
+    pen = 0.0
+    for char in age_text:
+        alpha, left, top, advance = glyphs[char]
+        placed.append((round(pen) + left, top, alpha))
+        pen += advance
+
+    x0 = min(x for x, _, _ in placed)
+    y0 = min(y for _, y, _ in placed)
+    x1 = max(x + alpha.shape[1] for x, _, alpha in placed)
+    y1 = max(y + alpha.shape[0] for _, y, alpha in placed)
+    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+    for x, y, alpha in placed:
+        region = mask[y - y0:y - y0 + alpha.shape[0], x - x0:x - x0 + alpha.shape[1]]
+        np.maximum(region, alpha, out=region)
+    return mask, x0, y0
+
+
+@lru_cache(maxsize=512)
+def get_age_text_layer(age_text, width, height, shadow_value):
+    """
+    Build the age label (shadow + white text) from cached glyphs and return it
+    as a blend layer (y, x, keep, add) covering only the text area, so that
+    frame[y:y+h, x:x+w] * keep + add draws it over any background.
+    Returns None if the label falls entirely outside the frame.
+    """
+    glyph_alpha, left, top = compose_age_text(age_text, width, height)
+    text_height, text_width = glyph_alpha.shape
 
     # Position in top-right with padding
     padding = 20
     x = width - text_width - padding
     y = padding
-
-    # Draw shadow
     shadow_offset = 3
-    draw.text((x + shadow_offset, y + shadow_offset), age_text,
-              font=font, fill=(0, 0, 0, 180))
 
-    # Draw text
-    draw.text((x, y), age_text, font=font, fill=(255, 255, 255))
+    # Area covered by the text and its shadow
+    x0, y0 = x + left, y + top
+    x1, y1 = x0 + text_width + shadow_offset, y0 + text_height + shadow_offset
+    size = (y1 - y0, x1 - x0)
+
+    shadow_alpha = np.zeros(size, dtype=np.float32)
+    shadow_alpha[shadow_offset:, shadow_offset:] = glyph_alpha
+    text_alpha = np.zeros(size, dtype=np.float32)
+    text_alpha[:text_height, :text_width] = glyph_alpha
+
+    # Shadow over background, then text over that, folded into one multiply-add
+    shadow_alpha = shadow_alpha[..., None]
+    text_alpha = text_alpha[..., None]
+    keep = (1 - shadow_alpha) * (1 - text_alpha)
+    add = shadow_value * shadow_alpha * (1 - text_alpha) + 255 * text_alpha + 0.5  # +0.5 rounds on cast
+
+    # Clip to the frame
+    cx0, cy0 = max(x0, 0), max(y0, 0)
+    cx1, cy1 = min(x1, width), min(y1, height)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return None
+    keep = keep[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+    add = add[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+    return cy0, cx0, keep, add
+
+
+def draw_age_text(frame, age, width, height, shadow_value):
+    """Draw the cached age label onto frame in place."""
+    layer = get_age_text_layer(f"{age:.2f}", width, height, shadow_value)
+    if layer is None:
+        return
+    y, x, keep, add = layer
+    region = frame[y:y + keep.shape[0], x:x + keep.shape[1]]
+    region[:] = (region * keep + add).astype(np.uint8)
+
+
+@lru_cache(maxsize=4)
+def get_greenscreen_background(width, height):
+    """Solid green frame for chroma keying (read-only, copy before drawing)."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :] = (0, 255, 0)  # BGR green
+    frame.flags.writeable = False
+    return frame
+
+
+def render_age_overlay(frame, age, width, height):
+    """
+    Render age text overlay on frame.
+    Returns frame with age overlay.
+    """
+    if age is None:
+        return frame
 
-    # Convert back to BGR for OpenCV
-    result = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-    return result
+    # Black shadow, white text
+    draw_age_text(frame, age, width, height, 0)
+    return frame
 
 
 def render_age_overlay_greenscreen(age, width, height):
@@ -223,41 +570,49 @@ def render_age_overlay_greenscreen(age, width, height):
     Render age text on bright green background for chroma keying.
     Returns BGR numpy array.
     """
-    # Create bright green background (0, 255, 0 in RGB, or 0, 255, 0 in BGR)
-    frame = np.zeros((height, width, 3), dtype=np.uint8)
-    frame[:, :] = (0, 255, 0)  # BGR green
+    frame = get_greenscreen_background(width, height).copy()
 
     if age is None:
         return frame
 
-    # Convert to PIL for text rendering
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(frame_rgb)
-    draw = ImageDraw.Draw(pil_image)
+    # Shadow is dark gray, not black, to avoid keying issues
+    draw_age_text(frame, age, width, height, 40)
+    return frame
 
-    age_text = f"{age:.2f}"
-    font = get_age_font(width, height)
 
-    # Get text bounding box
-    bbox = draw.textbbox((0, 0), age_text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
+@lru_cache(maxsize=512)
+def get_age_alpha_layer(age_text, width, height):
+    """
+    Age label (black shadow + white text) as a BGRA patch for transparent
+    overlays, derived from the cached blend layer. Returns (y, x, bgra) or None.
+    """
+    layer = get_age_text_layer(age_text, width, height, 0)
+    if layer is None:
+        return None
+    y, x, keep, add = layer
+    alpha = 1 - keep
+    # add holds the premultiplied color; divide alpha back out where there is any
+    color = np.divide(add - 0.5, alpha, out=np.zeros_like(add), where=alpha > 0)
+    bgra = np.concatenate([np.broadcast_to(color, color.shape[:2] + (3,)), alpha * 255], axis=2)
+    return y, x, (bgra + 0.5).clip(0, 255).astype(np.uint8)
 
-    # Position in top-right with padding
-    padding = 20
-    x = width - text_width - padding
-    y = padding
 
-    # Draw shadow (dark gray, not black to avoid keying issues)
-    shadow_offset = 3
-    draw.text((x + shadow_offset, y + shadow_offset), age_text,
-              font=font, fill=(40, 40, 40))
+def render_age_overlay_alpha(age, width, height):
+    """
+    Render age text on a transparent background, for editors that composite
+    with alpha instead of chroma keying.
+    Returns BGRA numpy array.
+    """
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
 
-    # Draw text (white)
-    draw.text((x, y), age_text, font=font, fill=(255, 255, 255))
+    if age is None:
+        return frame
 
-    # Convert back to BGR
-    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    layer = get_age_alpha_layer(f"{age:.2f}", width, height)
+    if layer is not None:
+        y, x, bgra = layer
+        frame[y:y + bgra.shape[0], x:x + bgra.shape[1]] = bgra
+    return frame
 
 
 def render_video(config):
@@ -270,7 +625,8 @@ def render_video(config):
     - format: "mp4" | "gif" | "png_sequence"
     - width: int
     - height: int
-    - frame_duration_ms: int (ms per photo, FPS fixed at 30)
+    - frame_duration_ms: int (ms per photo, rounded down to whole 1/30 s ticks;
+      videos hold one frame per photo at 30 / ticks FPS)
     - target_face_width: int
     - angle_offset: float (degrees)
     - do_scale: bool
@@ -280,6 +636,8 @@ def render_video(config):
     - end_frame: int (1-indexed)
     - birth_date: str
     - blur_amount: int (0 = no blur, higher = more blur)
+    - overlay_alpha: bool (overlay with transparency instead of greenscreen:
+      ProRes 4444 .mov with PyAV, else a PNG sequence)
     """
     global render_state
 
@@ -296,8 +654,7 @@ def render_video(config):
         render_state["started_at"] = time.time()
 
         # Clear log
-        with open(RENDER_LOG_PATH, "w") as f:
-            f.write("")
+        open_log()
 
         age_mode = config.get("age_mode", "show")
         # Support legacy show_age boolean
@@ -346,13 +703,17 @@ def render_video(config):
 
         log(f"Rendering frames {start_idx + 1} to {end_idx} ({len(valid_photos)} photos)")
 
-        # Calculate total output frames (30 FPS, frame_duration_ms per photo)
+        # Photo duration in ticks of 30 FPS (frame_duration_ms per photo)
         fps = 30
         frames_per_photo = max(1, int(config["frame_duration_ms"] * fps / 1000))
-        total_output_frames = len(valid_photos) * frames_per_photo
+
+        # Videos hold each photo for frames_per_photo ticks of 30 FPS by running at
+        # fps / frames_per_photo, so every photo is converted and encoded only once
+        video_fps = Fraction(fps, frames_per_photo)
 
         render_state["total_frames"] = len(valid_photos)
-        log(f"Output: {total_output_frames} frames at {fps} FPS ({frames_per_photo} frames per photo)")
+        log(f"Output: {len(valid_photos)} frames at {float(video_fps):g} FPS "
+            f"({frames_per_photo * 1000 / fps:g}ms per photo)")
 
         # Setup output path
         output_folder = PROJECT_ROOT / config.get("output_folder", "out")
@@ -388,17 +749,12 @@ def render_video(config):
             if HAS_PYAV:
                 writer = "pyav"
                 container = av.open(output_path, mode='w')
-                stream = container.add_stream('h264', rate=fps)
-                stream.width = width
-                stream.height = height
-                stream.pix_fmt = 'yuv420p'
-                # Set encoding options for quality
-                stream.options = {'crf': '18'}
-                log(f"Using PyAV H.264 encoder")
+                stream = add_h264_stream(container, video_fps, width, height)
+                log(f"Using PyAV H.264 encoder ({stream.codec_context.name})")
             else:
                 writer = "opencv"
                 fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                video_writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+                video_writer = cv2.VideoWriter(output_path, fourcc, float(video_fps), (width, height))
                 log(f"Using OpenCV fallback encoder")
             log(f"Output file: {output_path}")
 
@@ -412,23 +768,108 @@ def render_video(config):
         overlay_container = None
         overlay_stream = None
 
+        overlay_alpha = config.get("overlay_alpha", False)
+        render_overlay = render_age_overlay_alpha if overlay_alpha else render_age_overlay_greenscreen
+
         if age_mode in ("separate", "overlay_only"):
-            overlay_path = str(output_folder / f"{filename}_overlay.mp4")
-            if HAS_PYAV:
+            if overlay_alpha and HAS_PYAV:
+                overlay_path = str(output_folder / f"{filename}_overlay.mov")
                 overlay_container = av.open(overlay_path, mode='w')
-                overlay_stream = overlay_container.add_stream('h264', rate=fps)
-                overlay_stream.width = width
-                overlay_stream.height = height
-                overlay_stream.pix_fmt = 'yuv420p'
-                overlay_stream.options = {'crf': '18'}
+                overlay_stream = add_prores_alpha_stream(overlay_container, video_fps, width, height)
                 overlay_writer = "pyav"
+                log(f"Overlay video (ProRes 4444 with alpha): {overlay_path}")
+            elif overlay_alpha:
+                # Without PyAV, keep the alpha channel in a PNG sequence
+                overlay_folder = output_folder / f"{filename}_overlay"
+                overlay_folder.mkdir(parents=True, exist_ok=True)
+                overlay_path = str(overlay_folder)
+                overlay_writer = "png"
+                log(f"Overlay PNG sequence (with alpha): {overlay_path}")
             else:
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                overlay_writer = cv2.VideoWriter(overlay_path, fourcc, fps, (width, height))
-            log(f"Overlay video (greenscreen): {overlay_path}")
+                overlay_path = str(output_folder / f"{filename}_overlay.mp4")
+                if HAS_PYAV:
+                    overlay_container = av.open(overlay_path, mode='w')
+                    overlay_stream = add_h264_stream(overlay_container, video_fps, width, height)
+                    overlay_writer = "pyav"
+                else:
+                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                    overlay_writer = cv2.VideoWriter(overlay_path, fourcc, float(video_fps), (width, height))
+                log(f"Overlay video (greenscreen): {overlay_path}")
+
+        # Get face points and compute every photo's transform up front
+        face_points = []
+        for photo in valid_photos:
+            subject = get_subject_data(photo)
+            landmarks = subject.get("landmarks") if subject else None
+            face_points.append(get_face_points(landmarks))
+
+        has_face_points = np.array([points is not None for points in face_points])
+        transforms = np.zeros((len(valid_photos), 2, 3), dtype=np.float32)
+        if has_face_points.any():
+            transforms[has_face_points] = compute_similarity_transforms(
+                np.stack([points for points in face_points if points is not None]),
+                width, height,
+                config.get("target_face_width", 150),
+                config.get("do_scale", True),
+                config.get("do_rotate", True),
+                config.get("angle_offset", 0)
+            )
 
-        # Process each photo
-        for i, photo in enumerate(valid_photos):
+        # Ages for the overlay, all computed before rendering starts
+        if age_mode == "hide":
+            ages = [None] * len(valid_photos)
+        else:
+            ages = calculate_ages([photo.get("metadata", {}).get("date_taken") for photo in valid_photos],
+                                  birth_date)
+
+        # Photos shrunk by 2x or more are decoded at a reduced size to begin with
+        reductions = reduce_transforms(transforms)
+
+        # Frame buffers reused for every photo (encoders and writers copy what they're given)
+        frame_buf = np.empty((height, width, 3), dtype=np.uint8)
+        blur_buf = np.empty_like(frame_buf) if blur_amount > 0 else None
+        kernel_size = stack_blur_kernel_size(blur_amount)
+
+        # Pick the per-frame output steps once, so the loop doesn't re-check the config
+        if age_mode == "overlay_only":
+            write_frame = None  # Skip writing the main video frame
+        elif output_format == "png_sequence":
+            def write_frame(frame, frame_number):
+                cv2.imwrite(str(Path(output_path) / f"frame_{frame_number:04d}.png"), frame)
+        elif output_format == "gif":
+            def write_frame(frame, frame_number):
+                # Read the BGR buffer as RGB (one copy) and palettize right away, the way
+                # Pillow would when saving, so only 1 byte per pixel is kept per frame
+                pil_frame = Image.frombuffer("RGB", (width, height), frame, "raw", "BGR", 0, 1)
+                # For GIF, only add one frame per photo (no duplication)
+                gif_frames.append(pil_frame.convert("P", palette=Image.Palette.ADAPTIVE))
+        elif writer == "pyav":
+            def write_frame(frame, frame_number):
+                # One frame per photo; the stream rate sets how long it is held.
+                # FFmpeg converts BGR straight to the encoder's YUV format
+                for packet in stream.encode(wrap_video_frame(frame)):
+                    container.mux(packet)
+        else:
+            def write_frame(frame, frame_number):
+                video_writer.write(frame)
+
+        if overlay_writer == "pyav":
+            overlay_pix_fmt = 'bgra' if overlay_alpha else 'bgr24'
+
+            def write_overlay(overlay_frame, frame_number):
+                for packet in overlay_stream.encode(wrap_video_frame(overlay_frame, overlay_pix_fmt)):
+                    overlay_container.mux(packet)
+        elif overlay_writer == "png":
+            def write_overlay(overlay_frame, frame_number):
+                cv2.imwrite(str(Path(overlay_path) / f"frame_{frame_number:04d}.png"), overlay_frame)
+        elif overlay_writer is not None:
+            def write_overlay(overlay_frame, frame_number):
+                overlay_writer.write(overlay_frame)
+        else:
+            write_overlay = None
+
+        # Process each photo (the next few are read from disk in the background)
+        for i, (photo, (photo_found, img)) in enumerate(prefetch_photos(valid_photos, reductions)):
             if render_state["cancelled"]:
                 log("Render cancelled by user")
                 render_state["status"] = "cancelled"
@@ -438,103 +879,36 @@ def render_video(config):
             render_state["progress"] = int((i / len(valid_photos)) * 100)
 
             filename_photo = photo.get("filename")
-            photo_path = PHOTOS_DIR / filename_photo
 
-            if not photo_path.exists():
+            if not photo_found:
                 log(f"Warning: Photo not found: {filename_photo}")
                 continue
 
-            # Load image
-            img = cv2.imread(str(photo_path))
             if img is None:
                 log(f"Warning: Could not load: {filename_photo}")
                 continue
 
-            # Get face points
-            subject = get_subject_data(photo)
-            landmarks = subject.get("landmarks") if subject else None
-            face_points = get_face_points(landmarks)
-
-            if not face_points:
+            if not has_face_points[i]:
                 log(f"Warning: No landmarks for: {filename_photo}")
                 continue
 
-            # Compute transform
-            transform_matrix = compute_similarity_transform(
-                face_points,
-                width, height,
-                config.get("target_face_width", 150),
-                config.get("do_scale", True),
-                config.get("do_rotate", True),
-                config.get("angle_offset", 0)
-            )
-
             # Apply transform
-            frame = cv2.warpAffine(img, transform_matrix, (width, height),
-                                   borderMode=cv2.BORDER_CONSTANT,
-                                   borderValue=(0, 0, 0))
+            img, transform_matrix = prefilter_photo(img, transforms[i])
+            frame = warp_photo(img, transform_matrix, width, height, dst=frame_buf)
 
             # Apply blur if requested
-            if blur_amount > 0:
-                # Kernel size must be odd
-                kernel_size = blur_amount * 2 + 1
-                frame = cv2.GaussianBlur(frame, (kernel_size, kernel_size), 0)
-
-            # Get age for this photo
-            photo_date = photo.get("metadata", {}).get("date_taken")
-            age = calculate_age(photo_date, birth_date)
+            if blur_buf is not None:
+                frame = blur_frame(frame, kernel_size, dst=blur_buf)
 
-            # Handle age overlay based on mode
+            # Age overlay: drawn on the frame ('show'), written to the overlay
+            # output ('separate', 'overlay_only') or left out ('hide')
             if age_mode == "show":
-                frame = render_age_overlay(frame, age, width, height)
-            elif age_mode == "separate":
-                # Write greenscreen overlay frame to separate video
-                overlay_frame = render_age_overlay_greenscreen(age, width, height)
-                for _ in range(frames_per_photo):
-                    if overlay_writer == "pyav":
-                        overlay_rgb = cv2.cvtColor(overlay_frame, cv2.COLOR_BGR2RGB)
-                        av_frame = av.VideoFrame.from_ndarray(overlay_rgb, format='rgb24')
-                        for packet in overlay_stream.encode(av_frame):
-                            overlay_container.mux(packet)
-                    else:
-                        overlay_writer.write(overlay_frame)
-            elif age_mode == "overlay_only":
-                # Only write the greenscreen overlay, skip main video frame
-                overlay_frame = render_age_overlay_greenscreen(age, width, height)
-                for _ in range(frames_per_photo):
-                    if overlay_writer == "pyav":
-                        overlay_rgb = cv2.cvtColor(overlay_frame, cv2.COLOR_BGR2RGB)
-                        av_frame = av.VideoFrame.from_ndarray(overlay_rgb, format='rgb24')
-                        for packet in overlay_stream.encode(av_frame):
-                            overlay_container.mux(packet)
-                    else:
-                        overlay_writer.write(overlay_frame)
-                if (i + 1) % 10 == 0:
-                    log(f"Processed {i + 1}/{len(valid_photos)} photos")
-                continue  # Skip writing the main video frame
-            # 'hide' mode: don't add overlay, just use frame as-is
-
-            # Write frame(s)
-            if output_format == "png_sequence":
-                frame_path = Path(output_path) / f"frame_{i+1:04d}.png"
-                cv2.imwrite(str(frame_path), frame)
-            elif output_format == "gif":
-                # Convert BGR to RGB and store for GIF
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_frame = Image.fromarray(frame_rgb)
-                # For GIF, only add one frame per photo (no duplication)
-                gif_frames.append(pil_frame)
-            else:  # mp4
-                # Write multiple frames for smooth playback
-                for _ in range(frames_per_photo):
-                    if writer == "pyav":
-                        # Convert BGR to RGB
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        av_frame = av.VideoFrame.from_ndarray(frame_rgb, format='rgb24')
-                        for packet in stream.encode(av_frame):
-                            container.mux(packet)
-                    else:
-                        video_writer.write(frame)
+                render_age_overlay(frame, ages[i], width, height)
+            elif write_overlay is not None:
+                write_overlay(render_overlay(ages[i], width, height), i + 1)
+
+            if write_frame is not None:
+                write_frame(frame, i + 1)
 
             if (i + 1) % 10 == 0:
                 log(f"Processed {i + 1}/{len(valid_photos)} photos")
@@ -549,7 +923,7 @@ def render_video(config):
                     for packet in overlay_stream.encode():
                         overlay_container.mux(packet)
                     overlay_container.close()
-                else:
+                elif overlay_writer != "png":
                     overlay_writer.release()
                 log(f"Overlay video saved: {overlay_path}")
                 render_state["overlay_path"] = overlay_path
@@ -590,6 +964,11 @@ def render_video(config):
         render_state["error"] = str(e)
 
     finally:
+        close_log()
+        # Label layers and backgrounds are only reused within a render
+        get_age_text_layer.cache_clear()
+        get_age_alpha_layer.cache_clear()
+        get_greenscreen_background.cache_clear()
         render_state["running"] = False
         render_state["finished_at"] = time.time()
 
@@ -601,6 +980,24 @@ def cancel_render():
     log("Cancellation requested...")
 
 
+def claim_render():
+    """
+    Mark a render as running before its thread starts, so concurrent requests
+    can't start two. Returns False if one is already running.
+    """
+    with _render_lock:
+        if render_state["running"]:
+            return False
+        render_state["running"] = True
+        return True
+
+
+def release_render():
+    """Undo claim_render() when the render couldn't be started."""
+    with _render_lock:
+        render_state["running"] = False
+
+
 def get_render_state():
     """Return current render state."""
     return render_state.copy()
@@ -2,9 +2,10 @@
 // Video rendering UI and progress tracking
 
 import { state } from './state.js';
-import { showToast } from './utils.js';
+import { showToast, applyLogChunk } from './utils.js';
 
 let renderPollInterval = null;
+let renderLogOffset = 0;
 let capabilities = null;
 let lastOutputPath = null;
 let lastOverlayPath = null;
@@ -26,6 +27,7 @@ export function setupRenderPage() {
 
     // Age mode hint update
     document.getElementById('renderAgeMode').addEventListener('change', updateAgeModeHint);
+    document.getElementById('renderOverlayAlpha').addEventListener('change', updateAgeModeHint);
 
     // Blur slider update
     const blurSlider = document.getElementById('renderBlur');
@@ -56,8 +58,15 @@ export function setupRenderPage() {
 function updateAgeModeHint() {
     const mode = document.getElementById('renderAgeMode').value;
     const hint = document.getElementById('ageModeHint');
+    const hasOverlay = mode === 'separate' || mode === 'overlay_only';
+    const alpha = hasOverlay && document.getElementById('renderOverlayAlpha').checked;
 
-    const hints = {
+    document.getElementById('overlayAlphaRow').classList.toggle('hidden', !hasOverlay);
+
+    const hints = alpha ? {
+        'separate': 'Two videos: clean video + transparent overlay (ProRes 4444) for compositing',
+        'overlay_only': 'Only transparent overlay video (ProRes 4444) for compositing'
+    } : {
         'show': 'Age text rendered directly on video',
         'hide': 'Clean video without age text',
         'separate': 'Two videos: clean video + greenscreen overlay for chroma key compositing',
@@ -150,6 +159,7 @@ async function startRender() {
         do_scale: document.getElementById('renderScale').checked,
         do_rotate: document.getElementById('renderRotate').checked,
         age_mode: document.getElementById('renderAgeMode').value,
+        overlay_alpha: document.getElementById('renderOverlayAlpha').checked,
         blur_amount: parseInt(document.getElementById('renderBlur').value) || 0,
         start_frame: parseInt(document.getElementById('renderStartFrame').value) || 1,
         end_frame: parseInt(document.getElementById('renderEndFrame').value) || state.previewPhotos.length,
@@ -234,6 +244,8 @@ function startStatusPolling() {
         clearInterval(renderPollInterval);
     }
 
+    renderLogOffset = 0;
+
     // Poll immediately and then every 300ms
     pollRenderStatus();
     renderPollInterval = setInterval(pollRenderStatus, 300);
@@ -243,7 +255,7 @@ async function pollRenderStatus() {
     try {
         const [statusRes, logRes] = await Promise.all([
             fetch('/api/render-status'),
-            fetch('/api/render-log')
+            fetch(`/api/render-log?since=${renderLogOffset}`)
         ]);
 
         const status = await statusRes.json();
@@ -260,7 +272,7 @@ async function pollRenderStatus() {
 
         // Update log
         const logOutput = document.getElementById('renderLog');
-        logOutput.textContent = logData.log || '';
+        renderLogOffset = applyLogChunk(logOutput, logData, renderLogOffset);
         logOutput.scrollTop = logOutput.scrollHeight;
 
         // Check if complete
@@ -2,7 +2,7 @@
 // Status display, folder management, and scan functionality
 
 import { state } from './state.js';
-import { migrateFaceData, getSubjectData } from './utils.js';
+import { migrateFaceData, getSubjectData, applyLogChunk } from './utils.js';
 import { loadPreviewPhoto } from './preview.js';
 
 export function setupStatusPage() {
@@ -101,19 +101,18 @@ async function runScan() {
 
 function startScanPolling() {
     const scanLog = document.getElementById('scanLog');
+    let logOffset = 0;
 
     // Poll every 300ms
     state.scanPollInterval = setInterval(async () => {
         try {
-            // Get current log
-            const logResponse = await fetch('/api/scan-log');
+            // Get log output added since the last poll
+            const logResponse = await fetch(`/api/scan-log?since=${logOffset}`);
             if (logResponse.ok) {
                 const logData = await logResponse.json();
-                if (logData.log) {
-                    scanLog.textContent = logData.log;
-                    // Auto-scroll to bottom
-                    scanLog.scrollTop = scanLog.scrollHeight;
-                }
+                logOffset = applyLogChunk(scanLog, logData, logOffset);
+                // Auto-scroll to bottom
+                scanLog.scrollTop = scanLog.scrollHeight;
             }
 
             // Check scan status
@@ -56,6 +56,23 @@ export function getFacePoints(landmarks) {
     };
 }
 
+/**
+ * Apply a chunk from /api/scan-log or /api/render-log to a log element.
+ * Returns the byte offset to request on the next poll.
+ */
+export function applyLogChunk(element, logData, offset) {
+    if (logData.since === 0) {
+        // Full log (first poll, or the log was restarted), even if it's empty
+        element.textContent = logData.log;
+    } else if (logData.since === offset) {
+        element.textContent += logData.log;
+    } else {
+        // Stale response from an overlapping poll
+        return offset;
+    }
+    return logData.offset;
+}
+
 /**
  * Show a toast notification
  * @param {string} message - The message to display